@@ -0,0 +1,53 @@
+"""Compares browsing the albums of the catalog with building the refs on every call.
+
+Usage: python -m benchmarks.bench_browse [--albums 10000 100000]
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from mopidy.models import Ref
+
+from mopidy_kitchen.catalog import Catalog
+from mopidy_kitchen.index_files import AlbumIndex
+from mopidy_kitchen.uri import AlbumUri
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--albums", type=int, nargs="+", default=[10000, 100000], help="numbers of albums")
+    parser.add_argument("--rounds", type=int, default=20, help="number of browse calls")
+    args = parser.parse_args()
+
+    for num_albums in args.albums:
+        catalog = make_catalog(num_albums)
+        browses = (
+            ("uncached", legacy_browse_albums),
+            ("precomputed", lambda catalog: list(catalog.album_refs)),
+        )
+        for name, browse in browses:
+            start = time.perf_counter()
+            for _ in range(args.rounds):
+                browse(catalog)
+            elapsed = time.perf_counter() - start
+            print(f"{num_albums:>7} albums, {name:>11}: {elapsed * 1e3 / args.rounds:8.2f} ms per browse")
+
+
+def make_catalog(num_albums: int):
+    catalog = Catalog()
+    seen = set()
+    for album_no in range(num_albums):
+        data = {"name": f"Album {album_no}", "tracks": [{"path": "01.ogg"}]}
+        catalog.put_album(AlbumIndex(data, Path(f"/media/album-{album_no}")), seen)
+    catalog.freeze()
+    return catalog
+
+
+def legacy_browse_albums(catalog: Catalog):
+    # the browse implementation used before the refs were precomputed
+    return [Ref.album(uri=str(AlbumUri(album_id)), name=album.name) for album_id, album in catalog.albums.items()]
+
+
+if __name__ == "__main__":
+    main()
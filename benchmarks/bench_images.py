@@ -0,0 +1,82 @@
+"""Compares answering get_images from the scan with a stat call for every URI.
+
+Creates album directories with covers in a temporary directory and requests the images
+for the URIs of a page of albums and their tracks, as clients do when they show a page.
+
+Usage: python -m benchmarks.bench_images [--albums 100] [--tracks 12]
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from mopidy.models import Image
+
+from mopidy_kitchen.library import KitchenLibraryProvider
+from mopidy_kitchen.uri import AlbumTrackUri, AlbumUri, parse_uri
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--albums", type=int, default=100, help="number of albums on a page")
+    parser.add_argument("--tracks", type=int, default=12, help="number of tracks per album")
+    parser.add_argument("--rounds", type=int, default=20, help="number of requests")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_path = Path(tmp_dir)
+        for album_no in range(args.albums):
+            album_path = tmp_path / "media" / f"a{album_no}"
+            album_path.mkdir(parents=True)
+            tracks = [{"path": f"{no:02}.ogg"} for no in range(args.tracks)]
+            (album_path / "index.json").write_text(json.dumps({"name": f"Album {album_no}", "tracks": tracks}))
+            (album_path / "cover.jpg").write_bytes(b"")
+        provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+        uris = []
+        for album_id in provider._catalog.albums:
+            uris.append(str(AlbumUri(album_id)))
+            uris.extend(str(AlbumTrackUri(album_id, 1, no)) for no in range(1, args.tracks + 1))
+        print(f"Requesting images for {len(uris)} URIs")
+        for name, get_images in (("stat", get_images_with_stat), ("scan", KitchenLibraryProvider.get_images)):
+            start = time.perf_counter()
+            for _ in range(args.rounds):
+                get_images(provider, uris)
+            elapsed = (time.perf_counter() - start) / args.rounds
+            print(f"{name:>6}: {elapsed * 1e3:8.2f} ms per request")
+
+
+def make_config(tmp_path: Path):
+    kitchen_config = {
+        "media_dir": str(tmp_path / "media"),
+        "scan_threads": 1,
+        "scan_cache": False,
+        "scan_in_background": False,
+        "lazy_tracks": False,
+        "browse_page_size": 100,
+        "search_max_results": 500,
+        "album_links": False,
+        "cover_names": ["cover.jpg"],
+        "thumbnail_sizes": [],
+    }
+    return {"core": {"data_dir": str(tmp_path / "data")}, "kitchen": kitchen_config}
+
+
+def get_images_with_stat(provider: KitchenLibraryProvider, uris):
+    # the implementation used before
+    images = {}
+    for uri in uris:
+        kitchen_uri = parse_uri(uri)
+        if isinstance(kitchen_uri, (AlbumUri, AlbumTrackUri)):
+            album_id = kitchen_uri.album_id
+            album = provider._catalog.albums.get(album_id)
+            if album:
+                img_path = album.path / "cover.jpg"
+                if img_path.exists():
+                    images[uri] = [Image(uri=f"/kitchen/albums/{album_id}/cover.jpg")]
+    return images
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Compares the throughput of reading index files with the stdlib and the configured JSON parser.
+
+Usage: python -m benchmarks.bench_json [--files 2000] [--tracks 20]
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from mopidy_kitchen.json_parser import BACKEND, read_json_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=2000, help="number of index files")
+    parser.add_argument("--tracks", type=int, default=20, help="number of tracks per index file")
+    parser.add_argument("--rounds", type=int, default=5, help="number of rounds, the best one is reported")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        files = create_files(Path(tmp_dir), args.files, args.tracks)
+        size = sum(file.stat().st_size for file in files)
+        for name, read in (("json.load", read_stdlib), (f"{BACKEND} (binary)", read_json_file)):
+            elapsed = min(measure(read, files) for _ in range(args.rounds))
+            print(f"{name:>16}: {len(files) / elapsed:8.0f} files/s, {size / elapsed / 2**20:6.1f} MiB/s")
+
+
+def create_files(root: Path, count: int, tracks: int):
+    files = []
+    for album_no in range(count):
+        index = {
+            "name": f"Artist {album_no} - Album {album_no}",
+            "artist": f"Artist {album_no}",
+            "title": f"Album {album_no}",
+            "musicbrainz_id": "3b3c2d8f-2b3a-4f1c-9a5e-2f7c6b1d0e9a",
+            "tracks": [
+                {"path": f"{no:02}.ogg", "title": f"Track number {no} of album {album_no}", "length": 181.5}
+                for no in range(1, tracks + 1)
+            ],
+        }
+        file = root / f"{album_no}.json"
+        file.write_text(json.dumps(index, indent=2))
+        files.append(file)
+    return files
+
+
+def read_stdlib(file_path: Path):
+    # the way index files were read before the parser layer
+    with open(file_path) as f:
+        return json.load(f)
+
+
+def measure(read, files):
+    start = time.perf_counter()
+    for file in files:
+        read(file)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Compares looking up tracks by disc and track number with a linear search.
+
+Usage: python -m benchmarks.bench_lookup [--discs 10] [--tracks 60]
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from mopidy_kitchen.index_files import AlbumIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--discs", type=int, default=10, help="number of discs of the album")
+    parser.add_argument("--tracks", type=int, default=60, help="number of tracks per disc")
+    parser.add_argument("--rounds", type=int, default=20, help="number of times all tracks are looked up")
+    args = parser.parse_args()
+
+    discs = [
+        {"path": f"{disc_no:02}", "tracks": [{"path": f"{no:02}.ogg"} for no in range(1, args.tracks + 1)]}
+        for disc_no in range(1, args.discs + 1)
+    ]
+    album = AlbumIndex({"name": "Boxed Set", "discs": discs}, Path("/media/boxed-set"))
+    keys = [(track.disc_no, track.track_no) for track in album.tracks] * args.rounds
+    print(f"Looking up {len(keys)} tracks in an album with {len(album.tracks)} tracks")
+    for name, lookup in (("linear search", find_track), ("get_track", AlbumIndex.get_track)):
+        start = time.perf_counter()
+        for disc_no, track_no in keys:
+            lookup(album, disc_no, track_no)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>14}: {elapsed * 1e6 / len(keys):8.2f} µs per lookup")
+
+
+def find_track(album: AlbumIndex, disc_no: int, track_no: int):
+    # the lookup used before
+    for track in album.tracks:
+        if track.disc_no == disc_no and track.track_no == track_no:
+            return track
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Compares the memory used per track by the index classes with the previous representation.
+
+Parses synthetic album index files and measures the memory that remains allocated
+for the resulting album objects with tracemalloc.
+
+Usage: python -m benchmarks.bench_memory [--albums 5000] [--tracks 12]
+"""
+
+import argparse
+import gc
+import json
+import tracemalloc
+from functools import partial
+from pathlib import Path
+
+from mopidy_kitchen.index_files import AlbumIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--albums", type=int, default=5000, help="number of albums")
+    parser.add_argument("--tracks", type=int, default=12, help="number of tracks per album")
+    parser.add_argument("--artists", type=int, default=500, help="number of distinct artists")
+    args = parser.parse_args()
+
+    files = [make_index_file(album_no, args.tracks, args.artists) for album_no in range(args.albums)]
+    num_tracks = args.albums * args.tracks
+    # like a scan, the albums share one table of artists
+    read_albums = (("before", LegacyAlbumIndex), ("after", partial(AlbumIndex, artist_table={})))
+    for name, cls in read_albums:
+        size = measure(cls, files)
+        print(f"{name:>6}: {size / num_tracks:.0f} bytes per track ({size / 2**20:.1f} MiB for {num_tracks} tracks)")
+
+
+def make_index_file(album_no: int, tracks: int, artists: int):
+    artist = f"Artist {album_no % artists}"
+    index = {
+        "name": f"{artist} - Album {album_no}",
+        "artist": artist,
+        "title": f"Album {album_no}",
+        "tracks": [
+            {"path": f"{track_no:02}.ogg", "title": f"Track {album_no}/{track_no}", "artist": artist, "length": 180}
+            for track_no in range(1, tracks + 1)
+        ],
+    }
+    return Path(f"/media/music/{artist}/Album {album_no}"), json.dumps(index)
+
+
+def measure(cls, files):
+    gc.collect()
+    tracemalloc.start()
+    result = [cls(json.loads(data), path) for path, data in files]
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+class LegacyAlbumIndex:
+    # the representation used before the switch to slots and shared artists
+    def __init__(self, data: dict, root_path: Path):
+        self._path = root_path
+        self._name = data["name"]
+        self._title = data.get("title", "")
+        self._artists = [data["artist"]] if data.get("artist") else []
+        self._musicbrainz_id = data.get("musicbrainz_id", "")
+        self._tracks = tuple(
+            LegacyAlbumIndexTrack(root_path, 1, track_no, track)
+            for track_no, track in enumerate(data["tracks"], start=1)
+        )
+
+
+class LegacyAlbumIndexTrack:
+    def __init__(self, root_path: Path, disc_no: int, track_no: int, data: dict):
+        self._path = root_path / data["path"]
+        self._disc_no = disc_no
+        self._track_no = track_no
+        self._duration_ms = int(data.get("length", 0) * 1000)
+        self._title = data.get("title", "")
+        self._artists = [data["artist"]] if data.get("artist") else []
+        self._musicbrainz_id = data.get("musicbrainz_id", "")
+
+
+if __name__ == "__main__":
+    main()
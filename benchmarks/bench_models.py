@@ -0,0 +1,91 @@
+"""Compares building mopidy models on every request with reusing them from the model cache.
+
+Looks up all tracks of a set of albums repeatedly, as when whole albums are added to
+the tracklist, and builds the models with the functions used before the model cache.
+
+Usage: python -m benchmarks.bench_models [--albums 200] [--tracks 12]
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from mopidy.models import Album, Artist, Track
+
+from mopidy_kitchen.hash import make_hash
+from mopidy_kitchen.index_files import AlbumIndex
+from mopidy_kitchen.model_cache import ModelCache
+from mopidy_kitchen.uri import AlbumTrackUri, AlbumUri, ArtistUri
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--albums", type=int, default=200, help="number of albums")
+    parser.add_argument("--tracks", type=int, default=12, help="number of tracks per album")
+    parser.add_argument("--rounds", type=int, default=10, help="number of times all albums are looked up")
+    args = parser.parse_args()
+
+    albums = [make_album(album_no, args.tracks) for album_no in range(args.albums)]
+    cache = ModelCache()
+    lookups = (
+        ("uncached", lambda album_id, album: legacy_make_album_tracks(album_id, album)),
+        ("model cache", lambda album_id, album: list(cache.tracks(album_id, album))),
+    )
+    num_tracks = args.albums * args.tracks * args.rounds
+    for name, lookup in lookups:
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            for album in albums:
+                lookup(album.id, album)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>12}: {elapsed:.3f} s for {num_tracks} tracks ({elapsed * 1e6 / num_tracks:.2f} µs per track)")
+
+
+def make_album(album_no: int, tracks: int):
+    artist = f"Artist {album_no}"
+    data = {
+        "name": f"{artist} - Album {album_no}",
+        "artist": artist,
+        "title": f"Album {album_no}",
+        "tracks": [
+            {"path": f"{no:02}.ogg", "title": f"Track {no}", "artist": f"{artist} feat. Guest {no}", "length": 180}
+            for no in range(1, tracks + 1)
+        ],
+    }
+    return AlbumIndex(data, Path(f"/media/music/album-{album_no}"))
+
+
+def legacy_make_album_tracks(album_id: str, album: AlbumIndex):
+    # the model construction used before the model cache
+    kwargs = {
+        "uri": str(AlbumUri(album_id)),
+        "name": album.title,
+        "num_tracks": album.num_tracks,
+        "num_discs": album.num_discs,
+    }
+    if album.artists:
+        kwargs["artists"] = [legacy_make_artist(artist) for artist in album.artists]
+    mop_album = Album(**kwargs)
+    result = []
+    for track in album.tracks:
+        kwargs = {
+            "uri": str(AlbumTrackUri(album_id, track.disc_no, track.track_no)),
+            "name": track.title,
+            "album": mop_album,
+            "disc_no": track.disc_no,
+            "track_no": track.track_no,
+        }
+        if track.artists:
+            kwargs["artists"] = [legacy_make_artist(artist) for artist in track.artists]
+        if track.duration_ms:
+            kwargs["length"] = track.duration_ms
+        result.append(Track(**kwargs))
+    return result
+
+
+def legacy_make_artist(name: str):
+    return Artist(uri=str(ArtistUri(make_hash(name))), name=name)
+
+
+if __name__ == "__main__":
+    main()
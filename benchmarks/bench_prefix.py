@@ -0,0 +1,68 @@
+"""Compares prefix searches in the search index with walking the sorted words.
+
+Indexes a large number of distinct random words and measures prefix searches of
+different lengths. The previous implementation walked all words that start with
+the prefix and added the postings of each word to the result set.
+
+Usage: python -m benchmarks.bench_prefix [--words 1000000]
+"""
+
+import argparse
+import random
+import string
+import time
+from array import array
+from bisect import bisect_left
+
+from mopidy_kitchen.search_index import SearchIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, default=1000000, help="number of distinct words")
+    parser.add_argument("--postings", type=int, default=3, help="number of postings per word")
+    parser.add_argument("--prefixes", nargs="+", default=["s", "st", "sta", "star"], help="prefixes to search")
+    parser.add_argument("--rounds", type=int, default=5, help="number of times each search is repeated")
+    args = parser.parse_args()
+
+    print(f"Indexing {args.words} words ...")
+    rnd = random.Random(1)
+    words = set()
+    while len(words) < args.words:
+        words.add("".join(rnd.choices(string.ascii_lowercase, k=rnd.randint(3, 10))))
+    index = SearchIndex()
+    legacy_index = []
+    for word_no, word in enumerate(sorted(words)):
+        postings = [index.posting(f"doc{word_no * args.postings + n}") for n in range(args.postings)]
+        for posting in postings:
+            index.add_posting(word, posting)
+        legacy_index.append((word, array("q", postings)))
+    start = time.perf_counter()
+    index.build()
+    print(f"Built index with {len(words)} words in {time.perf_counter() - start:.2f} s")
+
+    searches = (
+        ("word walk", lambda prefix: legacy_find_startswith(legacy_index, prefix)),
+        ("prefix range", lambda prefix: index.find_postings(prefix)),
+    )
+    for prefix in args.prefixes:
+        for name, search in searches:
+            start = time.perf_counter()
+            for _ in range(args.rounds):
+                results = search(prefix)
+            elapsed = (time.perf_counter() - start) / args.rounds
+            print(f"{prefix!r:>7} {name:>13}: {elapsed * 1e3:8.3f} ms for {len(results)} postings")
+
+
+def legacy_find_startswith(sorted_words, term):
+    # the prefix search used before the prefix ranges
+    results = set()
+    low = bisect_left(sorted_words, (term,))
+    while low < len(sorted_words) and sorted_words[low][0].startswith(term):
+        results.update(sorted_words[low][1])
+        low += 1
+    return results
+
+
+if __name__ == "__main__":
+    main()
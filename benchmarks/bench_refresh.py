@@ -0,0 +1,73 @@
+"""Compares updating the search index for a single album with and without the delta.
+
+Builds the index of a catalog of synthetic albums and measures the update for one
+modified album: copying the index, replacing the document of the album, building the
+copy, and searching it once. Without the delta, every update merges all postings into
+new arrays, like the full rebuild before. Finally measures the refresh of one album in
+the whole catalog: copying it, replacing the album, and freezing the copy.
+
+Usage: python -m benchmarks.bench_refresh [--albums 20000] [--tracks 12]
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from mopidy_kitchen import search_index
+from mopidy_kitchen.catalog import Catalog, _index_entries
+from mopidy_kitchen.index_files import AlbumIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--albums", type=int, default=20000, help="number of albums")
+    parser.add_argument("--tracks", type=int, default=12, help="number of tracks per album")
+    parser.add_argument("--rounds", type=int, default=10, help="number of refreshes")
+    args = parser.parse_args()
+
+    catalog = Catalog()
+    seen = set()
+    for album_no in range(args.albums):
+        catalog.put_album(make_album(album_no, args.tracks, "Song"), seen)
+    catalog.freeze()
+
+    defaults = (search_index._MIN_MERGE_SIZE, search_index._MERGE_RATIO)
+    for name, (min_merge_size, merge_ratio) in (("full merge", (0, 1 << 62)), ("delta", defaults)):
+        search_index._MIN_MERGE_SIZE = min_merge_size
+        search_index._MERGE_RATIO = merge_ratio
+        start = time.perf_counter()
+        index = catalog.index
+        for round_no in range(args.rounds):
+            current = catalog.albums[make_album(round_no, args.tracks, "").id]
+            album = make_album(round_no, args.tracks, f"Tune {round_no}")
+            index = index.copy()
+            index.replace_document(album.id, _index_entries(current), _index_entries(album))
+            index.build()
+            index.find_postings("tune")
+        elapsed = (time.perf_counter() - start) / args.rounds
+        print(f"{name:>10}: {elapsed * 1e3:8.2f} ms per update for one album")
+    search_index._MIN_MERGE_SIZE, search_index._MERGE_RATIO = defaults
+
+    start = time.perf_counter()
+    current = catalog
+    for round_no in range(args.rounds):
+        album = make_album(round_no, args.tracks, f"Tune {round_no}")
+        current = current.copy()
+        current.put_album(album, set())
+        current.freeze()
+    elapsed = (time.perf_counter() - start) / args.rounds
+    print(f"{'catalog':>10}: {elapsed * 1e3:8.2f} ms per refresh of one album")
+
+
+def make_album(album_no: int, tracks: int, title: str):
+    data = {
+        "name": f"Album {album_no}",
+        "title": f"{title} Album {album_no}",
+        "artist": f"Artist {album_no % 100}",
+        "tracks": [{"path": f"{no:02}.ogg", "title": f"{title} {no} of {album_no}"} for no in range(tracks)],
+    }
+    return AlbumIndex(data, Path(f"/media/album-{album_no}"))
+
+
+if __name__ == "__main__":
+    main()
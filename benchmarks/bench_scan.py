@@ -0,0 +1,141 @@
+"""Compares the scanner against a pathlib based walker on a synthetic media tree.
+
+Counts the os calls that result in file system syscalls (stat, listdir, scandir,
+and stat calls on DirEntry objects) and measures the wall time of a warm scan,
+i.e. a scan where all index files are found in the scan cache.
+
+Usage: python -m benchmarks.bench_scan [--dirs 100000]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+from mopidy_kitchen.index_files import AlbumIndex
+from mopidy_kitchen.scan_cache import ScanCache
+from mopidy_kitchen.scanner import scan_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dirs", type=int, default=100000, help="number of directories in the tree")
+    parser.add_argument("--albums-per-dir", type=int, default=50, help="number of albums per artist directory")
+    parser.add_argument("--tracks", type=int, default=3, help="number of track files per album")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        root = Path(tmp_dir)
+        print(f"Creating tree with {args.dirs} directories in {root} ...")
+        create_tree(root, args.dirs, args.albums_per_dir, args.tracks)
+        cache = ScanCache()
+        scan_dir(root, cache=cache)
+
+        scans = (
+            ("pathlib walk", lambda: legacy_scan_dir(root, cache)),
+            ("scan_dir", lambda: scan_dir(root, cache=cache)),
+        )
+        for name, scan in scans:
+            with count_calls() as counts:
+                start = time.perf_counter()
+                found = scan()
+                elapsed = time.perf_counter() - start
+            total = sum(counts.values())
+            details = ", ".join(f"{key}: {value}" for key, value in sorted(counts.items()))
+            print(f"{name:>14}: {len(found)} albums in {elapsed:.3f} s, {total} syscalls ({details})")
+
+
+def create_tree(root: Path, dirs: int, albums_per_dir: int, tracks: int):
+    # one artist directory for each albums_per_dir album directories
+    albums = dirs * albums_per_dir // (albums_per_dir + 1)
+    for album_no in range(albums):
+        album_dir = root / f"artist-{album_no // albums_per_dir:05}" / f"album-{album_no:06}"
+        album_dir.mkdir(parents=True)
+        index = {"name": f"Album {album_no}", "tracks": [{"path": f"{no:02}.ogg"} for no in range(1, tracks + 1)]}
+        (album_dir / "index.json").write_text(json.dumps(index))
+        for no in range(1, tracks + 1):
+            (album_dir / f"{no:02}.ogg").touch()
+
+
+def legacy_scan_dir(root: Path, cache: ScanCache):
+    # the walker used before the switch to os.scandir, probes for index files with stat
+    found = []
+    pending = [root]
+    while pending:
+        dir = pending.pop()
+        index_file = dir / "index.json"
+        index_stat = _stat_file(index_file)
+        if index_stat:
+            found.append(cache.lookup(str(index_file), index_stat) or AlbumIndex.read_from_file(index_file))
+        elif not _stat_file(dir / "station.json"):
+            pending.extend(child for child in dir.iterdir() if child.is_dir())
+    return found
+
+
+def _stat_file(file_path: Path):
+    try:
+        return file_path.stat()
+    except FileNotFoundError:
+        return None
+
+
+@contextmanager
+def count_calls():
+    counts = Counter()
+    originals = {name: getattr(os, name) for name in ("stat", "lstat", "listdir", "scandir")}
+
+    def counting(name):
+        def wrapper(*args, **kwargs):
+            counts[name] += 1
+            return originals[name](*args, **kwargs)
+
+        return wrapper
+
+    def counting_scandir(*args, **kwargs):
+        counts["scandir"] += 1
+        return _ScandirIterator(originals["scandir"](*args, **kwargs), counts)
+
+    for name in ("stat", "lstat", "listdir"):
+        setattr(os, name, counting(name))
+    os.scandir = counting_scandir
+    try:
+        yield counts
+    finally:
+        for name, original in originals.items():
+            setattr(os, name, original)
+
+
+class _ScandirIterator:
+    def __init__(self, iterator, counts):
+        self._iterator = iterator
+        self._counts = counts
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self._iterator.close()
+
+    def __iter__(self):
+        return (_DirEntry(entry, self._counts) for entry in self._iterator)
+
+
+class _DirEntry:
+    def __init__(self, entry, counts):
+        self._entry = entry
+        self._counts = counts
+
+    def __getattr__(self, name):
+        return getattr(self._entry, name)
+
+    def stat(self, **kwargs):
+        self._counts["DirEntry.stat"] += 1
+        return self._entry.stat(**kwargs)
+
+
+if __name__ == "__main__":
+    main()
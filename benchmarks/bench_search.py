@@ -0,0 +1,103 @@
+"""Compares searching the catalog with the previous string based search index.
+
+Builds a catalog of synthetic albums and measures the time of prefix searches for
+short, common terms, including the filtering of the results by field.
+
+Usage: python -m benchmarks.bench_search [--albums 20000] [--tracks 12]
+"""
+
+import argparse
+import random
+import time
+from pathlib import Path
+
+from mopidy_kitchen.catalog import Catalog
+from mopidy_kitchen.index_files import AlbumIndex
+from mopidy_kitchen.search_index import posting_doc, posting_idx
+
+WORDS = ["the", "this", "that", "there", "love", "night", "day", "song", "blue", "heart", "rain", "time"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--albums", type=int, default=20000, help="number of albums")
+    parser.add_argument("--tracks", type=int, default=12, help="number of tracks per album")
+    parser.add_argument("--rounds", type=int, default=5, help="number of times each search is repeated")
+    parser.add_argument("--field", default="track_name", help="field to search in")
+    parser.add_argument("--terms", nargs="+", default=["th", "lo", "night"], help="search terms")
+    args = parser.parse_args()
+
+    albums = make_albums(args.albums, args.tracks)
+    catalog = Catalog()
+    seen = set()
+    for album in albums:
+        catalog.put_album(album, seen)
+    catalog.freeze()
+    legacy_index = LegacySearchIndex()
+    for album in albums:
+        legacy_index.add(album.title, f"{album.id}:album")
+        for artist in album.artists:
+            legacy_index.add(artist, f"{album.id}:albumartist")
+        for track_idx, title in enumerate(album.track_titles):
+            legacy_index.add(title, f"{album.id}:track_name:{track_idx}")
+
+    searches = (
+        ("strings", lambda term: legacy_index.search(term, args.field)),
+        ("postings", lambda term: search_postings(catalog.index, term, args.field)),
+    )
+    for term in args.terms:
+        for name, search in searches:
+            start = time.perf_counter()
+            for _ in range(args.rounds):
+                results = search(term)
+            elapsed = (time.perf_counter() - start) / args.rounds
+            print(f"{term!r:>8} {name:>9}: {elapsed * 1e3:8.2f} ms for {len(results)} albums")
+
+
+def make_albums(num_albums: int, tracks: int):
+    rnd = random.Random(1)
+    albums = []
+    for album_no in range(num_albums):
+        data = {
+            "name": f"Album {album_no}",
+            "title": " ".join(rnd.sample(WORDS, 2)),
+            "artist": f"{rnd.choice(WORDS)} band",
+            "tracks": [{"path": f"{no:02}.ogg", "title": " ".join(rnd.sample(WORDS, 3))} for no in range(tracks)],
+        }
+        albums.append(AlbumIndex(data, Path(f"/media/album-{album_no}")))
+    return albums
+
+
+def search_postings(index, term: str, field: str):
+    # the filtering done by the library provider
+    results = {}
+    for posting in index.find_postings(term, fields=[field]):
+        results.setdefault(posting_doc(posting), set()).add(posting_idx(posting))
+    return results
+
+
+class LegacySearchIndex:
+    # the index used before the switch to integer postings, with the filtering by field
+    def __init__(self):
+        self._index = {}
+
+    def add(self, string: str, result: str):
+        for word in string.lower().split():
+            self._index.setdefault(word, set()).add(result)
+
+    def search(self, term: str, field: str):
+        found = set()
+        for word, results in self._index.items():
+            if word.startswith(term):
+                found |= results
+        results = {}
+        for item in found:
+            segments = item.split(":")
+            if field == segments[1]:
+                flag = segments[2] if segments[1] == "track_name" else "a"
+                results.setdefault(segments[0], set()).add(flag)
+        return results
+
+
+if __name__ == "__main__":
+    main()
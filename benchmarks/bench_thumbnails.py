@@ -0,0 +1,71 @@
+"""Compares the size of a cover with its thumbnails, and rendering with and without draft decoding.
+
+Creates a synthetic cover scan, renders thumbnails of the given sizes from a full decode
+of the cover and from a draft decode at a reduced scale, and prints the time per cover
+and the number of bytes a client downloads for each image.
+
+Usage: python -m benchmarks.bench_thumbnails [--cover 3000] [--sizes 120,300]
+"""
+
+import argparse
+import tempfile
+import time
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image
+
+from mopidy_kitchen import thumbnails
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cover", type=int, default=3000, help="width and height of the cover in pixels")
+    parser.add_argument("--sizes", default="120,300", help="comma-separated thumbnail sizes")
+    parser.add_argument("--rounds", type=int, default=5, help="number of covers to render")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    cover = make_cover(args.cover)
+    print(f"cover: {len(cover):>9} bytes")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, open_image in (("full decode", open_full), ("draft decode", thumbnails._open_image)):
+            start = time.perf_counter()
+            for round_no in range(args.rounds):
+                cache_dir = Path(tmp_dir) / f"{name}-{round_no}"
+                cache_dir.mkdir()
+                cache = thumbnails.ThumbnailCache(cache_dir, sizes)
+                original = thumbnails._open_image
+                thumbnails._open_image = open_image
+                try:
+                    result = cache._make_thumbnails(write_cover(cache_dir, cover))
+                finally:
+                    thumbnails._open_image = original
+            elapsed = (time.perf_counter() - start) / args.rounds
+            print(f"{name:>12}: {elapsed * 1e3:8.2f} ms per cover")
+        for thumbnail in result:
+            file_size = (cache_dir / thumbnail.file_name).stat().st_size
+            print(f"{thumbnail.width:>4}x{thumbnail.height:<4}: {file_size:>9} bytes")
+
+
+def open_full(data: bytes, size: int):
+    # decodes the cover at its full size
+    return Image.open(BytesIO(data)).convert("RGB")
+
+
+def make_cover(size: int):
+    # a gradient compresses like a photo rather than a flat color
+    image = Image.linear_gradient("L").resize((size, size)).convert("RGB")
+    buffer = BytesIO()
+    image.save(buffer, "JPEG", quality=95)
+    return buffer.getvalue()
+
+
+def write_cover(dir: Path, data: bytes):
+    cover_path = dir / "cover.jpg"
+    cover_path.write_bytes(data)
+    return cover_path
+
+
+if __name__ == "__main__":
+    main()
@@ -26,6 +26,15 @@ class Extension(ext.Extension):
     def get_config_schema(self):
         schema = super().get_config_schema()
         schema["media_dir"] = config.Path()
+        schema["scan_threads"] = config.Integer(minimum=1)
+        schema["scan_cache"] = config.Boolean()
+        schema["scan_in_background"] = config.Boolean()
+        schema["lazy_tracks"] = config.Boolean()
+        schema["browse_page_size"] = config.Integer(minimum=1)
+        schema["search_max_results"] = config.Integer(minimum=1)
+        schema["album_links"] = config.Boolean()
+        schema["cover_names"] = config.List()
+        schema["thumbnail_sizes"] = config.List(optional=True)
         return schema
 
     def setup(self, registry):
@@ -40,3 +49,17 @@ class Extension(ext.Extension):
         albums_dir = self.get_data_dir(config) / "albums"
         albums_dir.mkdir(parents=True, exist_ok=True)
         return albums_dir
+
+    @classmethod
+    def get_thumbnails_dir(self, config):
+        thumbnails_dir = self.get_data_dir(config) / "thumbnails"
+        thumbnails_dir.mkdir(parents=True, exist_ok=True)
+        return thumbnails_dir
+
+    @classmethod
+    def get_scan_cache_file(self, config):
+        return self.get_data_dir(config) / "scan-cache.pickle"
+
+    @classmethod
+    def get_thumbnail_digests_file(self, config):
+        return self.get_data_dir(config) / "thumbnail-digests.pickle"
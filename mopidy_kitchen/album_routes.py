@@ -0,0 +1,37 @@
+import threading
+from pathlib import Path
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+from .index_files import AlbumIndex
+
+_routes = {}
+_lock = threading.Lock()
+
+
+class AlbumRoutes:
+    # Resolves album ids to album directories for the web app. The library publishes the
+    # albums of every new catalog, requests resolve against the albums published last.
+
+    def __init__(self):
+        self._albums = MappingProxyType({})
+
+    def __len__(self):
+        return len(self._albums)
+
+    def publish(self, albums: Mapping[str, AlbumIndex]):
+        self._albums = albums
+
+    def resolve(self, album_id: str) -> Optional[Path]:
+        album = self._albums.get(album_id)
+        return album.path if album else None
+
+
+def get_album_routes(data_dir: Path) -> AlbumRoutes:
+    # the library and the web app are created separately, they share the routes of their data dir
+    key = str(data_dir)
+    with _lock:
+        routes = _routes.get(key)
+        if routes is None:
+            routes = _routes[key] = AlbumRoutes()
+        return routes
@@ -0,0 +1,298 @@
+import heapq
+import logging
+import unicodedata
+from bisect import bisect_left
+from types import MappingProxyType
+from typing import List, Mapping, Set, Tuple
+
+from mopidy.models import Ref
+
+from .index_files import AlbumIndex, StationIndex
+from .search_index import SearchIndex
+from .uri import AlbumUri, StationUri
+
+logger = logging.getLogger(__name__)
+
+# up to this number of changes, refs are inserted in place, more changes are merged in a single pass
+_MAX_INSERTS = 256
+
+
+class Catalog:
+    # A catalog is built by a single thread and then published to readers, it must not be
+    # modified anymore once it is frozen. Updates go to a copy that shares the data of the
+    # original catalog until it is modified. The refs of albums and stations are kept in
+    # sorted order, freezing only updates the refs of the items that have changed.
+
+    @property
+    def albums(self) -> Mapping[str, AlbumIndex]:
+        # in no particular order, album_refs are sorted by name
+        return MappingProxyType(self._albums)
+
+    @property
+    def stations(self) -> Mapping[str, StationIndex]:
+        return MappingProxyType(self._stations)
+
+    @property
+    def index(self) -> SearchIndex:
+        return self._index
+
+    @property
+    def album_refs(self) -> Tuple[Ref, ...]:
+        return self._album_refs
+
+    @property
+    def album_letters(self) -> Mapping[str, Tuple[Ref, ...]]:
+        return MappingProxyType(self._album_letters)
+
+    @property
+    def station_refs(self) -> Tuple[Ref, ...]:
+        return self._station_refs
+
+    @property
+    def frozen(self):
+        return self._frozen
+
+    def __init__(self):
+        self._albums = {}
+        self._stations = {}
+        self._index = SearchIndex()
+        self._album_refs = ()
+        self._album_letters = {}
+        self._station_refs = ()
+        self._sorted_albums = _SortedRefs()
+        self._sorted_letters = {}
+        self._sorted_stations = _SortedRefs()
+        # the items that have been replaced or removed since the last freeze, None for added items
+        self._album_changes = {}
+        self._station_changes = {}
+        self._shared = False
+        self._frozen = False
+        self._dirty = False
+
+    def copy(self):
+        catalog = Catalog()
+        catalog._albums = self._albums
+        catalog._stations = self._stations
+        catalog._index = self._index
+        catalog._album_refs = self._album_refs
+        catalog._album_letters = self._album_letters
+        catalog._station_refs = self._station_refs
+        catalog._sorted_albums = self._sorted_albums
+        catalog._sorted_letters = self._sorted_letters
+        catalog._sorted_stations = self._sorted_stations
+        catalog._shared = True
+        return catalog
+
+    def put_album(self, album: AlbumIndex, seen: Set[str]):
+        album_id = album.id
+        current = self._albums.get(album_id)
+        if album_id in seen and not _replaces_duplicate(album, current, "albums"):
+            return False
+        seen.add(album_id)
+        # the scan cache returns identical objects for unchanged index files
+        if current is album:
+            return False
+        self._modify()
+        if current:
+            self._index.replace_document(album_id, _index_entries(current), _index_entries(album))
+        else:
+            self._index.add_document(album_id, _index_entries(album))
+        self._album_changes.setdefault(album_id, current)
+        self._albums[album_id] = album
+        if current:
+            current.release()
+        return True
+
+    def remove_album(self, album_id: str):
+        self._modify()
+        album = self._albums.pop(album_id)
+        self._album_changes.setdefault(album_id, album)
+        self._index.remove_document(album_id, _index_entries(album))
+        album.release()
+
+    def put_station(self, station: StationIndex, seen: Set[str]):
+        station_id = station.id
+        current = self._stations.get(station_id)
+        if station_id in seen and not _replaces_duplicate(station, current, "stations"):
+            return False
+        seen.add(station_id)
+        if current is station:
+            return False
+        self._modify()
+        entries = [(station.name, "station", -1)]
+        if current:
+            self._index.replace_document(_station_doc(station_id), [(current.name, "station", -1)], entries)
+        else:
+            self._index.add_document(_station_doc(station_id), entries)
+        self._station_changes.setdefault(station_id, current)
+        self._stations[station_id] = station
+        return True
+
+    def remove_station(self, station_id: str):
+        self._modify()
+        station = self._stations.pop(station_id)
+        self._station_changes.setdefault(station_id, station)
+        self._index.remove_document(_station_doc(station_id), [(station.name, "station", -1)])
+
+    def freeze(self):
+        if self._dirty:
+            self._index.build()
+            # browse results are built once per catalog, clients tend to poll them
+            self._update_album_refs()
+            self._update_station_refs()
+            self._dirty = False
+        self._frozen = True
+
+    def _update_album_refs(self):
+        removed, added = _sorted_changes(self._album_changes, self._albums, _make_album_ref)
+        self._album_changes = {}
+        if not removed and not added:
+            return
+        self._sorted_albums.update(removed, added)
+        self._album_refs = self._sorted_albums.refs()
+        # the letter of an album is the first character of its sort key
+        letters = {}
+        for key in removed:
+            letters.setdefault(_letter(key), ([], []))[0].append(key)
+        for key, ref in added:
+            letters.setdefault(_letter(key), ([], []))[1].append((key, ref))
+        for letter, (letter_removed, letter_added) in letters.items():
+            self._sorted_letters.setdefault(letter, _SortedRefs()).update(letter_removed, letter_added)
+        self._album_letters = {
+            letter: self._sorted_letters[letter].refs()
+            for letter in sorted(self._sorted_letters)
+            if len(self._sorted_letters[letter])
+        }
+
+    def _update_station_refs(self):
+        removed, added = _sorted_changes(self._station_changes, self._stations, _make_station_ref)
+        self._station_changes = {}
+        if removed or added:
+            self._sorted_stations.update(removed, added)
+            self._station_refs = self._sorted_stations.refs()
+
+    def _modify(self):
+        if self._frozen:
+            raise RuntimeError("Catalog is frozen")
+        if self._shared:
+            self._albums = dict(self._albums)
+            self._stations = dict(self._stations)
+            self._index = self._index.copy()
+            self._sorted_albums = self._sorted_albums.copy()
+            self._sorted_letters = {letter: refs.copy() for letter, refs in self._sorted_letters.items()}
+            self._sorted_stations = self._sorted_stations.copy()
+            self._shared = False
+        self._dirty = True
+
+
+class _SortedRefs:
+    # Refs in the order of their keys, which are unique. A few changes are inserted in place,
+    # many changes are merged in a single pass. The tuple of refs is only rebuilt after changes.
+
+    __slots__ = ("_keys", "_refs", "_tuple")
+
+    def __init__(self):
+        self._keys = []
+        self._refs = []
+        self._tuple = ()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def copy(self):
+        copy = _SortedRefs()
+        copy._keys = list(self._keys)
+        copy._refs = list(self._refs)
+        copy._tuple = self._tuple
+        return copy
+
+    def refs(self) -> Tuple[Ref, ...]:
+        if self._tuple is None:
+            self._tuple = tuple(self._refs)
+        return self._tuple
+
+    def update(self, removed: List[tuple], added: List[Tuple[tuple, Ref]]):
+        if not removed and not added:
+            return
+        self._tuple = None
+        if len(removed) + len(added) <= _MAX_INSERTS:
+            for key in removed:
+                pos = bisect_left(self._keys, key)
+                del self._keys[pos]
+                del self._refs[pos]
+            for key, ref in added:
+                pos = bisect_left(self._keys, key)
+                self._keys.insert(pos, key)
+                self._refs.insert(pos, ref)
+            return
+        removed = set(removed)
+        kept = ((key, ref) for key, ref in zip(self._keys, self._refs) if key not in removed)
+        merged = list(heapq.merge(kept, sorted(added, key=_first)))
+        self._keys = [key for key, _ in merged]
+        self._refs = [ref for _, ref in merged]
+
+
+def _station_doc(station_id: str):
+    # album and station ids can be equal, stations are indexed by their URI
+    return str(StationUri(station_id))
+
+
+def _replaces_duplicate(item, current, kind: str):
+    # of two items with the same name, the one with the lower path wins, regardless of the scan order
+    winner, loser = (item, current) if str(item.path) < str(current.path) else (current, item)
+    logger.warning("Duplicate %s: '%s' and '%s'", kind, loser.path, winner.path)
+    return winner is item
+
+
+def _index_entries(album: AlbumIndex):
+    # field names match mopidy's search attributes
+    yield album.title, "album", -1
+    # use the track titles and artists to avoid loading the tracks of lazy albums
+    for track_idx, title in enumerate(album.track_titles):
+        if title:
+            yield title, "track_name", track_idx
+    for artist in album.artists:
+        yield artist, "albumartist", -1
+    for track_idx, artists in enumerate(album.track_artists):
+        for artist in artists:
+            yield artist, "artist", track_idx
+
+
+def _sort_key(name: str, item_id: str = ""):
+    # sort case-insensitive and ignore accents, so that "Édith" is sorted next to "Edith",
+    # the id makes the keys of items with equal names unique
+    decomposed = unicodedata.normalize("NFKD", name.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char)), name, item_id
+
+
+def _letter(key: tuple):
+    # names that do not start with a latin letter are grouped under "0"
+    first = key[0][:1]
+    return first if "a" <= first <= "z" else "0"
+
+
+def _sorted_changes(changes: dict, items: dict, make_ref):
+    # the sort keys of the changed items to remove, and the keys and refs of the changed items to add
+    removed = []
+    added = []
+    for item_id, old in changes.items():
+        new = items.get(item_id)
+        if old is new:
+            continue
+        if old is not None:
+            removed.append(_sort_key(old.name, item_id))
+        if new is not None:
+            added.append((_sort_key(new.name, item_id), make_ref(item_id, new)))
+    return removed, added
+
+
+def _first(entry: tuple):
+    return entry[0]
+
+
+def _make_album_ref(album_id: str, album: AlbumIndex):
+    return Ref.album(uri=str(AlbumUri(album_id)), name=album.name)
+
+
+def _make_station_ref(station_id: str, station: StationIndex):
+    return Ref.album(uri=str(StationUri(station_id)), name=station.name)
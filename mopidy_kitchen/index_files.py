@@ -1,22 +1,46 @@
 import json
+import logging
+import sys
 from pathlib import Path
 
+from .hash import make_hash
+from .json_parser import read_json_file
+from .lru_cache import LruCache
+
+logger = logging.getLogger(__name__)
+
+# number of albums for which the tracks of lazy albums are kept in memory
+TRACKS_CACHE_SIZE = 1000
+
 
 class AlbumIndex:
+    __slots__ = (
+        "_id",
+        "_name",
+        "_path",
+        "_title",
+        "_artists",
+        "_musicbrainz_id",
+        "_num_discs",
+        "_disc_offsets",
+        "_track_titles",
+        "_track_artists",
+        "_cover",
+        "_tracks",
+    )
+
     @staticmethod
-    def read_from_file(file_path: Path):
-        with open(file_path) as f:
-            try:
-                data = json.load(f)
-            except json.JSONDecodeError as err:
-                raise IndexFileError(
-                    "Could not parse JSON in '%s': %s at %d:%d" % (file_path, err.msg, err.lineno, err.colno)
-                )
+    def read_from_file(file_path: Path, lazy=False, cover: str = None, artist_table: dict = None):
+        data = _read_json(file_path)
         try:
-            return AlbumIndex(data, file_path.parent)
+            return AlbumIndex(data, file_path.parent, lazy=lazy, cover=cover, artist_table=artist_table)
         except IndexFileError as err:
             raise IndexFileError("Invalid index format in '%s': %s" % (file_path, err))
 
+    @property
+    def id(self):
+        return self._id
+
     @property
     def name(self):
         return self._name
@@ -38,35 +62,124 @@ class AlbumIndex:
         return self._musicbrainz_id
 
     @property
-    def tracks(self):
-        return self._tracks
+    def num_discs(self):
+        return self._num_discs
 
-    def __init__(self, data: dict, root_path: Path):
+    @property
+    def num_tracks(self):
+        return len(self._track_titles)
+
+    @property
+    def track_titles(self):
+        return self._track_titles
+
+    @property
+    def track_artists(self):
+        return self._track_artists
+
+    @property
+    def cover(self):
+        # the file name of the cover image in the album directory, if any
+        return self._cover
+
+    def get_track(self, disc_no: int, track_no: int):
+        track_idx = self.get_track_idx(disc_no, track_no)
+        if track_idx is not None:
+            tracks = self.tracks
+            # the tracks of a lazy album are empty if it is unavailable
+            if track_idx < len(tracks):
+                return tracks[track_idx]
+
+    def get_track_idx(self, disc_no: int, track_no: int):
+        # tracks are sorted by disc and numbered consecutively, the position is found by the offset of the disc
+        if 0 < disc_no <= len(self._disc_offsets):
+            start = self._disc_offsets[disc_no - 1]
+            end = self._disc_offsets[disc_no] if disc_no < len(self._disc_offsets) else len(self._track_titles)
+            if 0 < track_no <= end - start:
+                return start + track_no - 1
+
+    @property
+    def tracks(self):
+        if self._tracks is not None:
+            return self._tracks
+        tracks = _tracks_cache.get(self)
+        if tracks is None:
+            tracks = self._load_tracks()
+            if tracks is None:
+                # not cached, the album may become available again, e.g. when a drive is mounted
+                return ()
+            _tracks_cache.put(self, tracks)
+        return tracks
+
+    def release(self):
+        # drops the loaded tracks of a lazy album that has been replaced or removed
+        if self._tracks is None:
+            _tracks_cache.remove(self)
+
+    def __init__(self, data: dict, root_path: Path, lazy=False, cover: str = None, artist_table: dict = None):
         context = "album"
         _check_object(data, context)
+        # artist tuples are shared by all tracks of the album, and by all albums read with the same
+        # table, e.g. by a scan, the table is dropped with the scan
+        if artist_table is None:
+            artist_table = {}
         self._path = root_path
         self._name = _extract_name(data, context)
+        self._id = make_hash(self._name)
         self._title = _extract_title(data, context)
-        self._artists = _extract_artists(data, context)
+        self._artists = _extract_artists(data, context, artist_table)
         self._musicbrainz_id = _extract_musicbrainz_id(data, context)
-        self._tracks = self._extract_tracks(data, context)
-
-    def _extract_tracks(self, data: dict, context: str):
+        self._cover = cover
+        # both modes count the discs of the index file, including empty discs
+        if lazy:
+            # lazy albums only read the data needed for browsing and the search index, the tracks
+            # are read from the index file when they are needed
+            self._tracks = None
+            self._disc_offsets, self._track_titles, self._track_artists = _extract_track_headers(
+                data, context, artist_table
+            )
+        else:
+            self._disc_offsets, tracks = self._extract_tracks(data, context, artist_table)
+            self._tracks = tracks
+            self._track_titles = tuple(track.title for track in tracks)
+            self._track_artists = tuple(track.artists for track in tracks)
+        self._num_discs = len(self._disc_offsets) or 1
+
+    def _load_tracks(self):
+        # returns None if the tracks cannot be loaded or do not match the tracks found by the scan
+        file_path = self._path / "index.json"
+        try:
+            album = AlbumIndex.read_from_file(file_path)
+        except (IndexFileError, OSError) as err:
+            logger.error("Could not load tracks of album '%s': %s", self._name, err)
+            return None
+        if album._disc_offsets != self._disc_offsets or album.num_tracks != self.num_tracks:
+            logger.error("Could not load tracks of album '%s': tracks have changed since the scan", self._name)
+            return None
+        return album.tracks
+
+    def _extract_tracks(self, data: dict, context: str, artist_table: dict):
         discs = _extract_discs(data, context)
+        offsets = []
         tracks = []
         for disc_no, disc in enumerate(discs, start=1):
             context = f"disc {disc_no}"
             _check_object(disc, context)
+            offsets.append(len(tracks))
+            # all tracks of a disc share the same directory path
             path = self._path / _get(disc, "path", context, default=".", check=_check_string)
             for track_no, track in enumerate(_get(disc, "tracks", context, check=_check_array), start=1):
-                tracks.append(AlbumIndexTrack(path, disc_no, track_no, track))
-        return tuple(tracks)
+                tracks.append(AlbumIndexTrack(path, disc_no, track_no, track, artist_table))
+        return tuple(offsets), tuple(tracks)
 
 
 class AlbumIndexTrack:
+    # there can be hundreds of thousands of tracks, keep instances small
+    __slots__ = ("_dir", "_file", "_disc_no", "_track_no", "_duration_ms", "_title", "_artists", "_musicbrainz_id")
+
     @property
     def path(self):
-        return self._path
+        return self._dir / self._file
 
     @property
     def disc_no(self):
@@ -92,33 +205,34 @@ class AlbumIndexTrack:
     def musicbrainz_id(self):
         return self._musicbrainz_id
 
-    def __init__(self, root_path: Path, disc_no: int, track_no: int, data: dict):
+    def __init__(self, root_path: Path, disc_no: int, track_no: int, data: dict, artist_table: dict = None):
         context = f"track {track_no} of disc {disc_no}"
         _check_object(data, context)
-        self._path = root_path / _get(data, "path", context, required=True, check=_check_string)
+        self._dir = root_path
+        self._file = _get(data, "path", context, required=True, check=_check_string)
         self._disc_no = disc_no
         self._track_no = track_no
         self._duration_ms = _extract_length(data, context)
         self._title = _extract_title(data, context)
-        self._artists = _extract_artists(data, context)
+        self._artists = _extract_artists(data, context, artist_table)
         self._musicbrainz_id = _extract_musicbrainz_id(data, context)
 
 
 class StationIndex:
+    __slots__ = ("_id", "_name", "_path", "_stream")
+
     @staticmethod
     def read_from_file(file_path: Path):
-        with open(file_path) as f:
-            try:
-                data = json.load(f)
-            except json.JSONDecodeError as err:
-                raise IndexFileError(
-                    "Could not parse JSON in '%s': %s at %d:%d" % (file_path, err.msg, err.lineno, err.colno)
-                )
+        data = _read_json(file_path)
         try:
             return StationIndex(data, file_path.parent)
         except IndexFileError as err:
             raise IndexFileError("Invalid index format in '%s': %s" % (file_path, err))
 
+    @property
+    def id(self):
+        return self._id
+
     @property
     def name(self):
         return self._name
@@ -136,9 +250,42 @@ class StationIndex:
         _check_object(data, context)
         self._path = root_path
         self._name = _extract_name(data, context)
+        self._id = make_hash(self._name)
         self._stream = _extract_stream(data, context)
 
 
+_tracks_cache = LruCache(TRACKS_CACHE_SIZE)
+
+
+def _extract_track_headers(data: dict, context: str, artist_table: dict):
+    # the disc offsets, titles, and artists of the tracks, without creating tracks, the tracks are
+    # validated like in AlbumIndexTrack, so that both modes accept the same index files
+    offsets = []
+    titles = []
+    artists = []
+    for disc_no, disc in enumerate(_extract_discs(data, context), start=1):
+        context = f"disc {disc_no}"
+        _check_object(disc, context)
+        _get(disc, "path", context, check=_check_string)
+        offsets.append(len(titles))
+        for track_no, track in enumerate(_get(disc, "tracks", context, check=_check_array), start=1):
+            context = f"track {track_no} of disc {disc_no}"
+            _check_object(track, context)
+            _get(track, "path", context, required=True, check=_check_string)
+            _extract_length(track, context)
+            titles.append(_extract_title(track, context))
+            artists.append(_extract_artists(track, context, artist_table))
+            _extract_musicbrainz_id(track, context)
+    return tuple(offsets), tuple(titles), tuple(artists)
+
+
+def _read_json(file_path: Path):
+    try:
+        return read_json_file(file_path)
+    except json.JSONDecodeError as err:
+        raise IndexFileError("Could not parse JSON in '%s': %s at %d:%d" % (file_path, err.msg, err.lineno, err.colno))
+
+
 def _extract_name(data: dict, context: str):
     return _get(data, "name", context, required=True, check=_check_string)
 
@@ -151,9 +298,17 @@ def _extract_title(data: dict, context: str):
     return _get(data, "title", context, default="", check=_check_string)
 
 
-def _extract_artists(data: dict, context: str):
+def _extract_artists(data: dict, context: str, artist_table: dict = None):
     artist = _get(data, "artist", context, check=_check_string)
-    return [artist] if artist else []
+    if not artist:
+        return ()
+    if artist_table is None:
+        return (sys.intern(artist),)
+    # share artist tuples between all tracks and albums of the same artist
+    artists = artist_table.get(artist)
+    if artists is None:
+        artists = artist_table.setdefault(artist, (sys.intern(artist),))
+    return artists
 
 
 def _extract_musicbrainz_id(data: dict, context: str):
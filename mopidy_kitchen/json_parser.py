@@ -0,0 +1,25 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = "orjson" if orjson else "json"
+
+
+def read_json_file(file_path):
+    # a single read in binary mode, decoding is left to the parser
+    with open(file_path, "rb") as f:
+        data = f.read()
+    return parse_json(data)
+
+
+def parse_json(data: bytes):
+    if orjson:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # the stdlib parser reports errors consistently and supports other encodings than UTF-8
+            pass
+    return json.loads(data)
@@ -1,30 +1,67 @@
+import heapq
 import logging
+import os
+import queue
+import threading
+import time
 from pathlib import Path
-from typing import List, Mapping
+from functools import partial
+from urllib.parse import quote
+from typing import Callable, Iterable, List, Mapping, Sequence, Union
 
 from mopidy import backend
-from mopidy.models import Album, Artist, Image, Ref, SearchResult, Track
+from mopidy.models import Image, Ref, SearchResult, Track
 
 from . import Extension
+from .album_routes import get_album_routes
+from .catalog import Catalog
 from .index_files import AlbumIndex, AlbumIndexTrack, StationIndex
-from .hash import make_hash
-from .search_index import SearchIndex
-from .scanner import read_album, scan_dir
+from .lru_cache import LruCache
+from .model_cache import ModelCache
+from .scan_cache import ScanCache
+from .scanner import iter_dir, read_album
+from .search_index import SearchIndex, posting_doc, posting_field, posting_idx
+from .thumbnails import ThumbnailCache
 from .uri import (
     ROOT_URI,
+    AlbumLettersUri,
+    AlbumsLetterUri,
+    AlbumsPageUri,
     AlbumsUri,
     AlbumTrackUri,
     AlbumUri,
-    ArtistUri,
+    KitchenUri,
     SearchUri,
     StationStreamUri,
     StationUri,
     StationsUri,
+    parse_album_id,
     parse_uri,
 )
 
 logger = logging.getLogger(__name__)
 
+# number of search results that are kept for repeated searches
+SEARCH_CACHE_SIZE = 100
+
+# seconds between the snapshots of the library that are published while the first scan runs in the background
+PUBLISH_INTERVAL = 1.0
+
+# the item index of postings that refer to the album rather than one of its tracks
+_ALBUM_MATCH = -1
+_STATION_MATCH = -2
+
+# the fields of the search index that are searched for a mopidy search field, by group of documents
+_ALBUM_FIELDS = ("album", "track_name", "albumartist", "artist")
+_QUERY_FIELDS = {
+    "any": {"albums": _ALBUM_FIELDS, "stations": ("station",)},
+    "track_name": {"albums": ("track_name",), "stations": ("station",)},
+}
+
+# search scores, matches of whole words rank higher than prefix matches
+_FIELD_WEIGHTS = {"album": 3, "track_name": 3, "albumartist": 2, "artist": 2, "station": 3}
+_EXACT_MATCH_FACTOR = 2
+
 
 class KitchenLibraryProvider(backend.LibraryProvider):
 
@@ -32,63 +69,211 @@ class KitchenLibraryProvider(backend.LibraryProvider):
 
     def __init__(self, backend, config):
         super().__init__(backend)
-        self._albums_dir = Extension.get_albums_dir(config)
         self._config = config[Extension.ext_name]
-        self._initialize()
+        # album directories are served from links in the albums dir, or resolved in memory
+        self._albums_dir = Extension.get_albums_dir(config) if self._config["album_links"] else None
+        self._album_routes = get_album_routes(Extension.get_data_dir(config))
+        cache_file = Extension.get_scan_cache_file(config) if self._config["scan_cache"] else None
+        # cached albums must have been read with the same options
+        options = {"lazy_tracks": self._config["lazy_tracks"], "cover_names": tuple(self._config["cover_names"])}
+        # loaded by the initialization, on the worker thread in the background
+        self._scan_cache = ScanCache(cache_file, options=options)
+        self._catalog = Catalog()
+        self._catalog.freeze()
+        self._models = ModelCache()
+        self._search_cache = LruCache(SEARCH_CACHE_SIZE)
+        sizes = _parse_thumbnail_sizes(self._config["thumbnail_sizes"])
+        digests_file = Extension.get_thumbnail_digests_file(config)
+        self._thumbnails = ThumbnailCache(Extension.get_thumbnails_dir(config), sizes, digests_file=digests_file)
+        # targets of the links in the albums directory by album id, read on first use
+        self._album_links = None
+        # items found by the current scan, or by the last scan if no scan is running
+        self._scanned = 0
+        self._scanning = False
+        self._initialized = threading.Event()
+        self._jobs = None
+        if self._config["scan_in_background"]:
+            # initialization and refreshes run one after another on a worker thread
+            self._jobs = queue.Queue()
+            threading.Thread(target=self._run_jobs, name="KitchenLibrary", daemon=True).start()
+        self._submit(self._initialize)
+
+    @property
+    def status(self):
+        catalog = self._catalog
+        return {
+            "ready": self._initialized.is_set(),
+            "scanning": self._scanning,
+            "scanned": self._scanned,
+            "albums": len(catalog.albums),
+            "stations": len(catalog.stations),
+            "search_cache_hits": self._search_cache.hits,
+            "search_cache_misses": self._search_cache.misses,
+        }
+
+    def _submit(self, job, *args):
+        if self._jobs:
+            self._jobs.put((job, args))
+        else:
+            job(*args)
+
+    def _run_jobs(self):
+        while True:
+            job, args = self._jobs.get()
+            try:
+                job(*args)
+            except Exception:
+                logger.exception("Error updating library")
+
+    def _publish(self, catalog: Catalog, album_ids: Iterable[str] = None):
+        # readers pick up the new catalog with the next call, the catalog they are using stays intact,
+        # album files are updated for the given albums or for all albums
+        catalog.freeze()
+        self._sync_albums_dir(catalog.albums, album_ids)
+        self._catalog = catalog
+        self._album_routes.publish(catalog.albums)
+        self._search_cache.clear()
+        self._thumbnails.update(catalog.albums, album_ids)
 
     def _initialize(self):
+        try:
+            start = time.monotonic()
+            self._scan_cache.load()
+            catalog = Catalog()
+            cached_items = self._scan_cache.items()
+            if self._jobs and cached_items:
+                # start from the cached items, without waiting for the scan to complete
+                self._populate(catalog, cached_items)
+                # links and thumbnails of albums that are not cached are reconciled after the scan
+                self._publish(catalog, list(catalog.albums))
+                logger.info("Initialized library from scan cache")
+                catalog = catalog.copy()
+            # in the background, clients see the library grow while it is scanned
+            publish_interval = PUBLISH_INTERVAL if self._jobs else None
+            catalog = self._populate(catalog, self._scan(), publish_interval)
+            self._publish(catalog)
+            logger.info("Initialized library in %.1f s", time.monotonic() - start)
+        finally:
+            self._initialized.set()
+
+    def _update(self):
+        catalog = self._catalog.copy()
+        self._populate(catalog, self._scan())
+        self._publish(catalog)
+
+    def _scan(self):
         media_dir = Path(self._config["media_dir"])
-        found = scan_dir(media_dir)
-        self._albums: Mapping[str, AlbumIndex] = {}
-        self._stations: Mapping[str, StationIndex] = {}
-        for item in found:
-            item_id = make_hash(item.name)
+        threads = self._config["scan_threads"]
+        lazy_tracks = self._config["lazy_tracks"]
+        cover_names = self._config["cover_names"]
+        items = iter_dir(
+            media_dir, threads=threads, cache=self._scan_cache, lazy_tracks=lazy_tracks, cover_names=cover_names
+        )
+        self._scanned = 0
+        self._scanning = True
+        try:
+            for item in items:
+                self._scanned += 1
+                yield item
+        finally:
+            self._scanning = False
+
+    def _populate(
+        self, catalog: Catalog, items: Iterable[Union[AlbumIndex, StationIndex]], publish_interval: float = None
+    ):
+        # items are added to the catalog as they are found, without collecting them first, with a publish
+        # interval, snapshots are published and the catalog is continued in a copy, which is returned
+        seen_albums = set()
+        seen_stations = set()
+        changed = 0
+        # albums put since the last snapshot, a snapshot only updates their links and thumbnails, the
+        # links of albums that have not been scanned yet are kept
+        put_albums = set()
+        last_publish = time.monotonic()
+        for item in items:
             if isinstance(item, AlbumIndex):
-                if item_id in self._albums:
-                    logger.warning("Duplicate albums: '%s' and '%s'", item.path, self._albums[item_id].path)
-                    continue
-                self._albums[item_id] = item
+                if catalog.put_album(item, seen_albums):
+                    changed += 1
+                    put_albums.add(item.id)
             elif isinstance(item, StationIndex):
-                if item_id in self._stations:
-                    logger.warning("Duplicate stations: '%s' and '%s'", item.path, self._stations[item_id].path)
-                    continue
-                self._stations[item_id] = item
-        logger.info("Found %d albums", len(self._albums))
-        logger.info("Found %d stations", len(self._stations))
-        self._build_index()
-        self._cleanup_albums_dir()
-        self._create_symlinks()
-
-    def _cleanup_albums_dir(self):
-        logger.info("Cleaning up albums directory")
+                catalog.put_station(item, seen_stations)
+            if publish_interval is not None and time.monotonic() - last_publish >= publish_interval:
+                self._publish(catalog, put_albums)
+                catalog = catalog.copy()
+                put_albums = set()
+                last_publish = time.monotonic()
+        stale_albums = [album_id for album_id in catalog.albums if album_id not in seen_albums]
+        for album_id in stale_albums:
+            catalog.remove_album(album_id)
+            self._models.invalidate(album_id)
+        for station_id in [station_id for station_id in catalog.stations if station_id not in seen_stations]:
+            catalog.remove_station(station_id)
+        logger.info("Found %d albums", len(catalog.albums))
+        logger.info("Found %d stations", len(catalog.stations))
+        logger.info("Updated library: %d albums added or modified, %d removed", changed, len(stale_albums))
+        return catalog
+
+    def _sync_albums_dir(self, albums: Mapping[str, AlbumIndex], album_ids: Iterable[str] = None):
+        # reconciles the links with the albums, only links that are missing, stale, or point to
+        # another directory are written, of the given albums or of all albums and links
+        if self._albums_dir is None:
+            return
+        if self._album_links is None:
+            self._album_links = self._read_album_links()
+        links = self._album_links
+        if album_ids is None:
+            album_ids = links.keys() | albums.keys()
+        created = removed = retargeted = 0
+        for album_id in album_ids:
+            album = albums.get(album_id)
+            target = str(album.path) if album else None
+            if album_id not in links:
+                if target and self._write_album_link(album_id, target, replace=False):
+                    created += 1
+            elif not target:
+                if self._remove_album_link(album_id):
+                    removed += 1
+            elif links[album_id] != target:
+                if self._write_album_link(album_id, target, replace=True):
+                    retargeted += 1
+        logger.info(
+            "Updated albums directory: %d links created, %d removed, %d retargeted", created, removed, retargeted
+        )
+
+    def _read_album_links(self):
+        # entries that are not links map to None, they are replaced or removed like stale links
+        links = {}
+        try:
+            with os.scandir(self._albums_dir) as entries:
+                for entry in entries:
+                    links[entry.name] = os.readlink(entry.path) if entry.is_symlink() else None
+        except OSError as err:
+            logger.warning("Error reading albums directory: %s", err)
+        return links
+
+    def _remove_album_link(self, album_id: str):
         try:
-            files = self._albums_dir.glob("*")
-            for file in files:
-                file.unlink()
-        except IOError as err:
-            logger.warning("Error cleaning up albums directory: %s", err)
-
-    def _create_symlinks(self):
-        logger.info("Creating symlinks in albums directory")
+            (self._albums_dir / album_id).unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as err:
+            logger.warning("Error removing symlink in albums directory: %s", err)
+            return False
+        del self._album_links[album_id]
+        return True
+
+    def _write_album_link(self, album_id: str, target: str, replace: bool):
+        link_path = self._albums_dir / album_id
         try:
-            for album_id, album in self._albums.items():
-                symlink_path = self._albums_dir / album_id
-                if not symlink_path.exists():
-                    symlink_path.symlink_to(album.path)
-        except IOError as err:
-            logger.warning("Error creating symlinks in albums directory: %s", err)
-
-    def _build_index(self):
-        self._index = SearchIndex()
-        for album_id, album in self._albums.items():
-            # tags added as 2nd segment match mopidy's search attributes
-            self._index.add(album.title, f"{album_id}:album")
-            for track_idx, track in enumerate(album.tracks):
-                if track.title:
-                    self._index.add(track.title, f"{album_id}:track_name:{track_idx}")
-            for artist in album.artists:
-                self._index.add(artist, f"{album_id}:albumartist")
-        self._index.build()
+            if replace:
+                link_path.unlink()
+            link_path.symlink_to(target)
+        except OSError as err:
+            logger.warning("Error creating symlink in albums directory: %s", err)
+            self._album_links.pop(album_id, None)
+            return False
+        self._album_links[album_id] = target
+        return True
 
     # == browse ==
 
@@ -99,6 +284,13 @@ class KitchenLibraryProvider(backend.LibraryProvider):
                 return self._browse_root()
             if isinstance(kitchen_uri, AlbumsUri):
                 return self._browse_albums()
+            if isinstance(kitchen_uri, AlbumsPageUri):
+                return self._browse_page(self._catalog.album_refs, kitchen_uri.page, AlbumsPageUri)
+            if isinstance(kitchen_uri, AlbumLettersUri):
+                return self._browse_album_letters()
+            if isinstance(kitchen_uri, AlbumsLetterUri):
+                refs = self._catalog.album_letters.get(kitchen_uri.letter, ())
+                return self._browse_page(refs, kitchen_uri.page, partial(AlbumsLetterUri, kitchen_uri.letter))
             if isinstance(kitchen_uri, AlbumUri):
                 return self._browse_album(kitchen_uri)
             if isinstance(kitchen_uri, StationsUri):
@@ -113,23 +305,41 @@ class KitchenLibraryProvider(backend.LibraryProvider):
     def _browse_root(self):
         return [
             Ref.directory(uri=str(AlbumsUri()), name="Albums"),
+            Ref.directory(uri=str(AlbumLettersUri()), name="Albums A-Z"),
             Ref.directory(uri=str(StationsUri()), name="Stations"),
         ]
 
     def _browse_albums(self):
-        return [_make_album_ref(album_id, album) for album_id, album in self._albums.items()]
+        return list(self._catalog.album_refs)
+
+    def _browse_album_letters(self):
+        return [
+            Ref.directory(uri=str(AlbumsLetterUri(letter)), name=letter.upper() if letter != "0" else "#")
+            for letter in self._catalog.album_letters
+        ]
+
+    def _browse_page(self, refs: Sequence[Ref], page: int, make_uri: Callable[[int], KitchenUri]):
+        # pages are slices of precomputed refs, a page is followed by a link to the next one
+        page_size = self._config["browse_page_size"]
+        num_pages = max(1, -(-len(refs) // page_size))
+        if page > num_pages:
+            return []
+        result = list(refs[(page - 1) * page_size : page * page_size])
+        if page < num_pages:
+            result.append(Ref.directory(uri=str(make_uri(page + 1)), name=f"Page {page + 1} of {num_pages}"))
+        return result
 
     def _browse_album(self, uri: AlbumUri):
-        album = self._albums.get(uri.album_id)
+        album = self._catalog.albums.get(uri.album_id)
         if album:
             return [_make_album_track_ref(uri.album_id, track) for track in album.tracks]
         return []
 
     def _browse_stations(self):
-        return [_make_station_ref(station_id, station) for station_id, station in self._stations.items()]
+        return list(self._catalog.station_refs)
 
     def _browse_station(self, uri: StationUri):
-        station = self._stations.get(uri.station_id)
+        station = self._catalog.stations.get(uri.station_id)
         if station:
             stream_uri = str(StationStreamUri(uri.station_id, 1))
             return [Ref.track(uri=stream_uri, name=station.name)]
@@ -154,27 +364,29 @@ class KitchenLibraryProvider(backend.LibraryProvider):
             return []
 
     def _lookup_album(self, uri: AlbumUri):
-        album = self._albums.get(uri.album_id)
+        album = self._catalog.albums.get(uri.album_id)
         if album:
-            return _make_album_tracks(uri.album_id, album)
+            return list(self._models.tracks(uri.album_id, album))
         return []
 
     def _lookup_album_track(self, uri: AlbumTrackUri):
-        album = self._albums.get(uri.album_id)
+        album = self._catalog.albums.get(uri.album_id)
         if album:
-            track = _find_track(album, uri.disc_no, uri.track_no)
-            if track:
-                return [_make_album_track(uri.album_id, album, track)]
+            track_idx = album.get_track_idx(uri.disc_no, uri.track_no)
+            if track_idx is not None:
+                track = self._models.track(uri.album_id, album, track_idx)
+                if track:
+                    return [track]
         return []
 
     def _lookup_station(self, uri: StationUri):
-        station = self._stations.get(uri.station_id)
+        station = self._catalog.stations.get(uri.station_id)
         if station:
             return [_make_station_track(uri.station_id, station, 1)]
         return []
 
     def _lookup_station_stream(self, uri: StationStreamUri):
-        station = self._stations.get(uri.station_id)
+        station = self._catalog.stations.get(uri.station_id)
         if station:
             return [_make_station_track(uri.station_id, station, uri.stream_no)]
         return []
@@ -182,60 +394,130 @@ class KitchenLibraryProvider(backend.LibraryProvider):
     # == search ==
 
     def search(self, query, uris=None, exact=False):
+        # results are cached for the current catalog, which is part of the key, so that results of an
+        # older catalog that are put after the cache has been cleared are never hits
+        catalog = self._catalog
+        key = (catalog, _search_key(query, uris, exact))
+        result = self._search_cache.get(key)
+        if result is None:
+            result = self._search(catalog, query, uris, exact)
+            self._search_cache.put(key, result)
+        return result
+
+    def _search(self, catalog: Catalog, query, uris, exact: bool):
         q = []
         for field, values in query.items() if query else []:
             q.extend((field, value) for value in values)
+        index = catalog.index
+        scope = _search_scope(index, uris)
+        # scores of matching albums, tracks, and stations by document, the results of all fields are combined
         results = {}
         for field, expr in q:
             terms = _split_lower(expr)
-            for album_id, flags in self._search_terms(terms, field, exact).items():
-                results.setdefault(album_id, set()).update(flags)
+            for doc, scores in self._search_terms(index, terms, field, scope, exact).items():
+                doc_results = results.setdefault(doc, {})
+                for flag, score in scores.items():
+                    doc_results[flag] = doc_results.get(flag, 0) + score
+        # only the best results are turned into models, ties are broken by document and track order
+        max_results = self._config["search_max_results"]
+        album_hits = ((scores[_ALBUM_MATCH], -doc) for doc, scores in results.items() if _ALBUM_MATCH in scores)
+        track_hits = (
+            (score, -doc, -flag)
+            for doc, scores in results.items()
+            for flag, score in scores.items()
+            if flag != _ALBUM_MATCH
+        )
         mop_albums = []
+        for _, doc in heapq.nlargest(max_results, album_hits):
+            album_id = index.doc(-doc)
+            mop_albums.append(self._models.album(album_id, catalog.albums[album_id]))
         mop_tracks = []
-        for album_id, flags in results.items():
-            album = self._albums[album_id]
-            if "a" in flags:
-                mop_albums.append(_make_album(album_id, album))
-            for track_idx in [int(flag) for flag in flags if flag.isdigit()]:
-                mop_tracks.append(_make_album_track(album_id, album, album.tracks[track_idx]))
+        for _, doc, flag in heapq.nlargest(max_results, track_hits):
+            if -flag == _STATION_MATCH:
+                station_id = parse_uri(index.doc(-doc)).station_id
+                mop_tracks.append(_make_station_track(station_id, catalog.stations[station_id], 1))
+            else:
+                album_id = index.doc(-doc)
+                track = self._models.track(album_id, catalog.albums[album_id], -flag)
+                # the tracks of unavailable lazy albums are missing
+                if track:
+                    mop_tracks.append(track)
         search_uri = str(SearchUri())
         return SearchResult(uri=search_uri, albums=mop_albums, tracks=mop_tracks)
 
-    def _search_terms(self, terms: List[str], field: str, exact: bool):
-        results_for_terms = [self._search_term(term, field, exact) for term in terms]
+    def _search_terms(self, index: SearchIndex, terms: List[str], field: str, scope: dict, exact: bool):
+        # all terms must match, either the track itself or its album
+        results_for_terms = [self._search_term(index, term, field, scope, exact) for term in terms]
+        if not results_for_terms:
+            return {}
         results = {}
-        for album_id, flags_list in _union_dicts(results_for_terms).items():
-            all_flags = set.union(*flags_list)
-            filtered_flags = {flag for flag in all_flags if all("a" in flags or flag in flags for flags in flags_list)}
-            if filtered_flags:
-                results[album_id] = filtered_flags
+        for doc in set.intersection(*(set(term_results) for term_results in results_for_terms)):
+            scores_list = [term_results[doc] for term_results in results_for_terms]
+            doc_results = {}
+            for flag in set().union(*scores_list):
+                total = 0
+                for scores in scores_list:
+                    score = max(scores.get(flag, 0), scores.get(_ALBUM_MATCH, 0))
+                    if not score:
+                        break
+                    total += score
+                else:
+                    doc_results[flag] = total
+            if doc_results:
+                results[doc] = doc_results
         return results
 
-    def _search_term(self, term: str, field: str, exact: bool):
-        found = self._index.find(term, exact=exact)
+    def _search_term(self, index: SearchIndex, term: str, field: str, scope: dict, exact: bool):
+        found = set()
+        exact_found = set()
+        for group, fields in _QUERY_FIELDS.get(field, {"albums": (field,)}).items():
+            if group in scope:
+                found |= index.find_postings(term, exact=exact, fields=fields, docs=scope[group])
+                if not exact:
+                    exact_found |= index.find_postings(term, exact=True, fields=fields, docs=scope[group])
+        if exact:
+            exact_found = found
+        weights = [_FIELD_WEIGHTS.get(name, 1) for name in index.fields]
+        station_tag = index.field_tag("station")
         results = {}
-        for item in found:
-            segments = item.split(":")
-            if field == "any" or field == segments[1]:
-                # flag is "a" if matches the album, or a track number if matches a track
-                flag = segments[2] if segments[1] == "track_name" else "a"
-                results.setdefault(segments[0], set()).add(flag)
+        for posting in found:
+            # flag is the index of the matching track, _ALBUM_MATCH if the album matches,
+            # or _STATION_MATCH if the document is a station
+            tag = posting_field(posting)
+            flag = _STATION_MATCH if tag == station_tag else posting_idx(posting)
+            score = weights[tag] * (_EXACT_MATCH_FACTOR if posting in exact_found else 1)
+            scores = results.setdefault(posting_doc(posting), {})
+            if score > scores.get(flag, 0):
+                scores[flag] = score
         return results
 
     # == get_images ==
 
     def get_images(self, uris):
+        # covers are found by the scan, images are answered from memory without parsing every URI,
+        # the tracks of an album share the images of the album, thumbnails follow the cover
+        albums = self._catalog.albums
+        album_images = {}
         images = {}
         for uri in uris:
-            kitchen_uri = parse_uri(uri)
-            if isinstance(kitchen_uri, (AlbumUri, AlbumTrackUri)):
-                album_id = kitchen_uri.album_id
-                album = self._albums.get(album_id)
-                if album:
-                    img_path = album.path / "cover.jpg"
-                    if img_path.exists():
-                        image_uri = f"/kitchen/albums/{album_id}/cover.jpg"
-                        images[uri] = [Image(uri=image_uri)]
+            album_id = parse_album_id(uri)
+            if album_id is None:
+                continue
+            result = album_images.get(album_id)
+            if result is None:
+                album = albums.get(album_id)
+                result = album_images[album_id] = self._album_images(album_id, album) if album else []
+            if result:
+                images[uri] = result
+        return images
+
+    def _album_images(self, album_id: str, album: AlbumIndex):
+        if not album.cover:
+            return []
+        images = [Image(uri=f"/kitchen/albums/{album_id}/{quote(album.cover)}")]
+        for thumbnail in self._thumbnails.get(album_id, album):
+            uri = f"/kitchen/thumbnails/{thumbnail.file_name}"
+            images.append(Image(uri=uri, width=thumbnail.width, height=thumbnail.height))
         return images
 
     # == refresh ==
@@ -244,54 +526,103 @@ class KitchenLibraryProvider(backend.LibraryProvider):
         if uri:
             kitchen_uri = parse_uri(uri)
             if isinstance(kitchen_uri, AlbumUri):
-                self._refresh_album(kitchen_uri.album_id)
+                self._submit(self._refresh_album, kitchen_uri.album_id)
             elif isinstance(kitchen_uri, AlbumsUri):
-                self._initialize()
+                self._submit(self._update)
         else:
-            self._initialize()
+            self._submit(self._update)
 
     def _refresh_album(self, album_id):
-        album = self._albums.get(album_id)
+        catalog = self._catalog.copy()
+        album = catalog.albums.get(album_id)
         if album:
-            del self._albums[album_id]
-            new_album = read_album(album.path)
+            new_album = read_album(
+                album.path,
+                lazy_tracks=self._config["lazy_tracks"],
+                cover_names=self._config["cover_names"],
+                cache=self._scan_cache,
+            )
+            self._models.invalidate(album_id)
+            if not new_album or new_album.id != album_id:
+                catalog.remove_album(album_id)
             if new_album:
-                album_id = make_hash(new_album.name)
-                self._albums[album_id] = new_album
-                self._build_index()
+                catalog.put_album(new_album, catalog.albums.keys() - {album_id})
+            self._publish(catalog, {album_id, new_album.id} if new_album else {album_id})
 
     # == get_playback_uri (extension) ==
 
     def get_playback_uri(self, uri: str):
         kitchen_uri = parse_uri(uri)
         if isinstance(kitchen_uri, AlbumTrackUri):
-            album = self._albums.get(kitchen_uri.album_id)
+            album = self._catalog.albums.get(kitchen_uri.album_id)
             if album:
-                track = _find_track(album, kitchen_uri.disc_no, kitchen_uri.track_no)
+                track = album.get_track(kitchen_uri.disc_no, kitchen_uri.track_no)
                 if track:
                     return track.path.as_uri()
         elif isinstance(kitchen_uri, StationStreamUri):
-            station = self._stations.get(kitchen_uri.station_id)
+            station = self._catalog.stations.get(kitchen_uri.station_id)
             if station and kitchen_uri.stream_no == 1:
                 return station.stream
 
 
-def _split_lower(string: str):
-    return [part for part in string.lower().split() if part]
+def _parse_thumbnail_sizes(values: Sequence[str]):
+    sizes = []
+    for value in values:
+        try:
+            size = int(value)
+            if size < 1:
+                raise ValueError("not a positive number")
+            sizes.append(size)
+        except ValueError:
+            logger.warning("Ignoring invalid thumbnail size '%s'", value)
+    return sizes
 
 
-def _find_track(album: AlbumIndex, disc_no: int, track_no: int):
-    for track in album.tracks:
-        if track.disc_no == disc_no and track.track_no == track_no:
-            return track
+def _split_lower(string: str):
+    return [part for part in string.lower().split() if part]
 
 
-def _make_album_ref(album_id: str, album: AlbumIndex):
-    return Ref.album(uri=str(AlbumUri(album_id)), name=album.name)
+def _search_key(query, uris, exact: bool):
+    # queries that only differ in case, whitespace, or order of fields and values share a key
+    fields = tuple(
+        sorted(
+            (field, tuple(sorted(" ".join(_split_lower(value)) for value in values)))
+            for field, values in (query or {}).items()
+        )
+    )
+    return fields, tuple(sorted(uris)) if uris else None, bool(exact)
 
 
-def _make_station_ref(station_id: str, station: StationIndex):
-    return Ref.album(uri=str(StationUri(station_id)), name=station.name)
+def _search_scope(index: SearchIndex, uris):
+    # maps groups of documents to the document numbers to search in, or None to search all documents
+    if not uris:
+        return {"albums": None, "stations": None}
+    scope = {}
+    for uri in uris:
+        try:
+            kitchen_uri = parse_uri(uri)
+        except ValueError as e:
+            logger.error("Error in search for %s: %s", uri, e)
+            continue
+        if kitchen_uri == ROOT_URI:
+            scope.update(albums=None, stations=None)
+        elif isinstance(kitchen_uri, (AlbumsUri, AlbumsPageUri, AlbumLettersUri, AlbumsLetterUri)):
+            scope["albums"] = None
+        elif isinstance(kitchen_uri, StationsUri):
+            scope["stations"] = None
+        elif isinstance(kitchen_uri, (AlbumUri, AlbumTrackUri)):
+            _restrict_scope(scope, "albums", index.doc_no(kitchen_uri.album_id))
+        elif isinstance(kitchen_uri, (StationUri, StationStreamUri)):
+            _restrict_scope(scope, "stations", index.doc_no(str(StationUri(kitchen_uri.station_id))))
+    return scope
+
+
+def _restrict_scope(scope: dict, group: str, doc_no):
+    if group in scope and scope[group] is None:
+        return
+    docs = scope.setdefault(group, set())
+    if doc_no is not None:
+        docs.add(doc_no)
 
 
 def _make_album_track_ref(album_id, track: AlbumIndexTrack):
@@ -299,62 +630,9 @@ def _make_album_track_ref(album_id, track: AlbumIndexTrack):
     return Ref.track(uri=uri, name=track.title)
 
 
-def _make_album(album_id: str, album: AlbumIndex):
-    kwargs = {
-        "uri": str(AlbumUri(album_id)),
-        "name": album.title,
-        "num_tracks": len(album.tracks),
-        "num_discs": album.tracks[-1].disc_no if len(album.tracks) else 1,
-    }
-    if album.artists:
-        kwargs["artists"] = [_make_artist(artist) for artist in album.artists]
-    if album.musicbrainz_id:
-        kwargs["musicbrainz_id"] = album.musicbrainz_id
-    return Album(**kwargs)
-
-
-def _make_album_track(album_id: str, album: AlbumIndex, track: AlbumIndexTrack):
-    mop_album = _make_album(album_id, album)
-    return _make_track_with_album(album_id, track, mop_album)
-
-
-def _make_album_tracks(album_id: str, album: AlbumIndex):
-    mop_album = _make_album(album_id, album)
-    return [_make_track_with_album(album_id, track, mop_album) for track in album.tracks]
-
-
-def _make_track_with_album(album_id: str, track: AlbumIndexTrack, album: Album):
-    kwargs = {
-        "uri": str(AlbumTrackUri(album_id, track.disc_no, track.track_no)),
-        "name": track.title,
-        "album": album,
-        "disc_no": track.disc_no,
-        "track_no": track.track_no,
-    }
-    if track.artists:
-        kwargs["artists"] = [_make_artist(artist) for artist in track.artists]
-    if track.duration_ms:
-        kwargs["length"] = track.duration_ms
-    if track.musicbrainz_id:
-        kwargs["musicbrainz_id"] = track.musicbrainz_id
-    return Track(**kwargs)
-
-
 def _make_station_track(station_id: str, station: StationIndex, stream_no: int):
     kwargs = {
         "uri": str(StationStreamUri(station_id, stream_no)),
         "name": station.name,
     }
     return Track(**kwargs)
-
-
-def _make_artist(name: str):
-    uri = str(ArtistUri(make_hash(name)))
-    return Artist(uri=uri, name=name)
-
-
-def _union_dicts(dicts: List[dict]):
-    if not dicts:
-        return set()
-    keys = set.union(*[set(d.keys()) for d in dicts])
-    return {key: [d.get(key, set()) for d in dicts] for key in keys}
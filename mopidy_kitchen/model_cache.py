@@ -0,0 +1,102 @@
+from typing import Optional, Tuple
+
+from mopidy.models import Album, Artist, Track
+
+from .hash import make_hash
+from .index_files import AlbumIndex, AlbumIndexTrack
+from .lru_cache import LruCache
+from .uri import AlbumTrackUri, AlbumUri, ArtistUri
+
+ALBUMS_CACHE_SIZE = 1000
+ARTISTS_CACHE_SIZE = 10000
+
+
+class ModelCache:
+    # Mopidy models are immutable, so they are built once for each album and reused until the
+    # album is replaced. Entries remember the album they were built from, an album that has
+    # been replaced in a new catalog does not match its entry anymore.
+
+    @property
+    def albums(self) -> LruCache:
+        return self._albums
+
+    def __init__(self, albums_size=ALBUMS_CACHE_SIZE, artists_size=ARTISTS_CACHE_SIZE):
+        self._albums = LruCache(albums_size)
+        self._artists = LruCache(artists_size)
+
+    def album(self, album_id: str, album: AlbumIndex) -> Album:
+        return self._entry(album_id, album).album
+
+    def tracks(self, album_id: str, album: AlbumIndex) -> Tuple[Track, ...]:
+        entry = self._entry(album_id, album)
+        if entry.tracks is None:
+            tracks = tuple(self._make_track(album_id, track, entry.album) for track in album.tracks)
+            # the tracks of an unavailable lazy album are empty and not kept, they are loaded again next time
+            if len(tracks) != album.num_tracks:
+                return tracks
+            entry.tracks = tracks
+        return entry.tracks
+
+    def track(self, album_id: str, album: AlbumIndex, track_idx: int) -> Optional[Track]:
+        tracks = self.tracks(album_id, album)
+        if 0 <= track_idx < len(tracks):
+            return tracks[track_idx]
+
+    def artist(self, name: str) -> Artist:
+        artist = self._artists.get(name)
+        if artist is None:
+            artist = Artist(uri=str(ArtistUri(make_hash(name))), name=name)
+            self._artists.put(name, artist)
+        return artist
+
+    def invalidate(self, album_id: str):
+        self._albums.remove(album_id)
+
+    def clear(self):
+        self._albums.clear()
+        self._artists.clear()
+
+    def _entry(self, album_id: str, album: AlbumIndex):
+        entry = self._albums.get(album_id)
+        if entry is None or entry.source is not album:
+            entry = _AlbumModels(album, self._make_album(album_id, album))
+            self._albums.put(album_id, entry)
+        return entry
+
+    def _make_album(self, album_id: str, album: AlbumIndex):
+        kwargs = {
+            "uri": str(AlbumUri(album_id)),
+            "name": album.title,
+            "num_tracks": album.num_tracks,
+            "num_discs": album.num_discs,
+        }
+        if album.artists:
+            kwargs["artists"] = [self.artist(artist) for artist in album.artists]
+        if album.musicbrainz_id:
+            kwargs["musicbrainz_id"] = album.musicbrainz_id
+        return Album(**kwargs)
+
+    def _make_track(self, album_id: str, track: AlbumIndexTrack, album: Album):
+        kwargs = {
+            "uri": str(AlbumTrackUri(album_id, track.disc_no, track.track_no)),
+            "name": track.title,
+            "album": album,
+            "disc_no": track.disc_no,
+            "track_no": track.track_no,
+        }
+        if track.artists:
+            kwargs["artists"] = [self.artist(artist) for artist in track.artists]
+        if track.duration_ms:
+            kwargs["length"] = track.duration_ms
+        if track.musicbrainz_id:
+            kwargs["musicbrainz_id"] = track.musicbrainz_id
+        return Track(**kwargs)
+
+
+class _AlbumModels:
+    __slots__ = ("source", "album", "tracks")
+
+    def __init__(self, source: AlbumIndex, album: Album):
+        self.source = source
+        self.album = album
+        self.tracks = None
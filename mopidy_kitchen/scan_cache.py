@@ -0,0 +1,89 @@
+import logging
+import os
+import pickle
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# increment when the pickled index classes change in an incompatible way
+CACHE_VERSION = 8
+
+
+class ScanCache:
+    def __init__(self, file_path: Path = None, options: dict = None):
+        self._file_path = file_path
+        self._options = options or {}
+        self._entries = {}
+        self._retained = {}
+        # the file is only written if entries have been stored or dropped since it was read
+        self._dirty = True
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def items(self):
+        return [entry[2] for entry in self._entries.values()]
+
+    def load(self):
+        if not self._file_path or not self._file_path.exists():
+            return
+        try:
+            with open(self._file_path, "rb") as f:
+                data = pickle.load(f)
+            if data.get("version") != CACHE_VERSION:
+                logger.info("Discarding scan cache of outdated version")
+                return
+            if data.get("options") != self._options:
+                logger.info("Discarding scan cache created with different options")
+                return
+            self._entries = data["entries"]
+            self._dirty = False
+            logger.info("Loaded scan cache with %d entries", len(self._entries))
+        except Exception as err:
+            logger.warning("Could not read scan cache '%s': %s", self._file_path, err)
+
+    def lookup(self, file_path: str, stat: os.stat_result):
+        entry = self._entries.get(file_path)
+        if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            with self._lock:
+                self._retained[file_path] = entry
+            return entry[2]
+
+    def store(self, file_path: str, stat: os.stat_result, item):
+        with self._lock:
+            self._retained[file_path] = (stat.st_mtime_ns, stat.st_size, item)
+            self._dirty = True
+
+    def update(self, file_path: str, stat: os.stat_result, item):
+        # replaces the entry of an item that has been read again outside of a scan, e.g. to pick up
+        # a new cover of an album, and writes the file, like a scan that finds one changed item
+        entry = (stat.st_mtime_ns, stat.st_size, item)
+        with self._lock:
+            self._entries[file_path] = entry
+            if file_path in self._retained:
+                self._retained[file_path] = entry
+        if self._file_path:
+            self._save()
+
+    def commit(self):
+        # entries that have not been looked up or stored since the last commit are stale,
+        # without new entries, the retained entries are a subset that is smaller if any were dropped
+        with self._lock:
+            dirty = self._dirty or len(self._retained) != len(self._entries)
+            self._entries = self._retained
+            self._retained = {}
+            self._dirty = False
+        if self._file_path and dirty:
+            self._save()
+
+    def _save(self):
+        tmp_path = self._file_path.with_name(self._file_path.name + ".tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                data = {"version": CACHE_VERSION, "options": self._options, "entries": self._entries}
+                pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._file_path)
+        except Exception as err:
+            logger.warning("Could not write scan cache '%s': %s", self._file_path, err)
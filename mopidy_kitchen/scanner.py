@@ -1,53 +1,129 @@
 import logging
+import os
+import stat
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
 from pathlib import Path
-from typing import List
 
 from .index_files import AlbumIndex, StationIndex, IndexFileError
+from .scan_cache import ScanCache
 
 logger = logging.getLogger(__name__)
 
+# file names of cover images in album directories, in order of preference
+COVER_NAMES = ("cover.jpg",)
 
-def scan_dir(root_dir: Path):
+
+def scan_dir(root_dir: Path, threads: int = 1, cache: ScanCache = None, lazy_tracks=False, cover_names=COVER_NAMES):
+    found = iter_dir(root_dir, threads=threads, cache=cache, lazy_tracks=lazy_tracks, cover_names=cover_names)
+    # include the path in the sort key to make the order of duplicates deterministic
+    return sorted(found, key=lambda item: (item.name, str(item.path)))
+
+
+def iter_dir(root_dir: Path, threads: int = 1, cache: ScanCache = None, lazy_tracks=False, cover_names=COVER_NAMES):
     root = Path(root_dir).resolve()
     if not root.is_dir():
         logger.error("Not a directory: %s", root)
-        return []
-    found = []
-    _scan_dir(root, found)
-    return sorted(found, key=lambda a: a.name)
-
-
-def _scan_dir(dir: Path, found: List[AlbumIndex]):
-    index_file = dir / "index.json"
-    station_file = dir / "station.json"
-    if index_file.is_file():
-        album = _read_album_index(index_file)
-        if album:
-            found.append(album)
-    elif station_file.is_file():
-        station = _read_station_index(station_file)
-        if station:
-            found.append(station)
+        return
+    if cache is None:
+        cache = ScanCache()
+    # albums of the scan share artist tuples, the table is dropped after the scan
+    read_album = partial(_read_album_index, lazy=lazy_tracks, cover_names=cover_names, artist_table={})
+    if threads > 1:
+        yield from _walk_parallel(root, threads, cache, read_album)
     else:
-        for child in dir.iterdir():
-            if child.is_dir():
-                _scan_dir(child, found)
+        yield from _walk(root, cache, read_album)
+    cache.commit()
+
+
+def _walk(root: Path, cache: ScanCache, read_album):
+    pending = [str(root)]
+    while pending:
+        item, subdirs = _scan_dir(pending.pop(), cache, read_album)
+        if item:
+            yield item
+        pending.extend(subdirs)
 
 
-def read_album(dir: Path):
-    index_file = dir / "index.json"
-    return _read_album_index(index_file)
+def _walk_parallel(root: Path, threads: int, cache: ScanCache, read_album):
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="KitchenScanner") as executor:
+        pending = {executor.submit(_scan_dir, str(root), cache, read_album)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item, subdirs = future.result()
+                pending.update(executor.submit(_scan_dir, subdir, cache, read_album) for subdir in subdirs)
+                if item:
+                    yield item
 
 
-def _read_album_index(file_path: Path):
+def _scan_dir(dir: str, cache: ScanCache, read_album):
+    # most directories are album directories, a single stat call detects the index file
+    # and provides the mtime and size needed to validate the cache entry, the directory
+    # is only listed to find the cover when the index file is read
+    index_file = os.path.join(dir, "index.json")
+    index_stat = _stat_file(index_file)
+    if index_stat:
+        return _read_cached(index_file, index_stat, cache, read_album), []
+    # otherwise, list the directory, DirEntry.is_file() and DirEntry.is_dir() use the
+    # file type from the listing and don't need an extra stat call
+    with os.scandir(dir) as it:
+        entries = list(it)
+    for entry in entries:
+        if entry.name == "station.json" and entry.is_file():
+            return _read_cached(entry.path, entry.stat(), cache, _read_station_index), []
+    return None, [entry.path for entry in entries if entry.is_dir()]
+
+
+def _stat_file(file_path: str):
     try:
-        return AlbumIndex.read_from_file(file_path)
+        file_stat = os.stat(file_path)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    return file_stat if stat.S_ISREG(file_stat.st_mode) else None
+
+
+def _read_cached(file_path: str, file_stat: os.stat_result, cache: ScanCache, read):
+    item = cache.lookup(file_path, file_stat)
+    if not item:
+        item = read(Path(file_path))
+        if item:
+            cache.store(file_path, file_stat, item)
+    return item
+
+
+def read_album(dir: Path, lazy_tracks=False, cover_names=COVER_NAMES, cache: ScanCache = None):
+    # reads an album again, e.g. when it is refreshed, the album replaces its entry in the given cache
+    index_file = os.path.join(dir, "index.json")
+    index_stat = _stat_file(index_file) if cache else None
+    album = _read_album_index(Path(index_file), lazy=lazy_tracks, cover_names=cover_names)
+    if album and index_stat:
+        cache.update(index_file, index_stat, album)
+    return album
+
+
+def _read_album_index(file_path: Path, lazy=False, cover_names=COVER_NAMES, artist_table: dict = None):
+    try:
+        cover = _find_cover(file_path.parent, cover_names)
+        return AlbumIndex.read_from_file(file_path, lazy=lazy, cover=cover, artist_table=artist_table)
     except IndexFileError as err:
         logger.error(str(err))
     except Exception:
         logger.exception("Failed reading album index at %s", file_path)
 
 
+def _find_cover(dir: Path, cover_names):
+    # a single listing of the directory instead of a stat call for each name
+    if not cover_names:
+        return None
+    try:
+        names = set(os.listdir(dir))
+    except OSError as err:
+        logger.warning("Could not list album directory '%s': %s", dir, err)
+        return None
+    return next((name for name in cover_names if name in names), None)
+
+
 def _read_station_index(file_path: Path):
     try:
         return StationIndex.read_from_file(file_path)
@@ -1,68 +1,323 @@
 import logging
-from typing import Set
-
+from array import array
+from bisect import bisect_left
+from typing import Iterable, List, Set, Tuple
 
 logger = logging.getLogger(__name__)
 
+# A posting is an integer that combines the tag of a field, the number of a document and the
+# index of an item in the document: field << 48 | doc << 16 | (idx + 1)
+_DOC_SHIFT = 16
+_FIELD_SHIFT = 48
+_IDX_MASK = (1 << _DOC_SHIFT) - 1
+_DOC_MASK = (1 << (_FIELD_SHIFT - _DOC_SHIFT)) - 1
+_MAX_FIELDS = 16
+
+# the delta of a partition is merged when it exceeds the minimum size and a fraction of the postings
+_MIN_MERGE_SIZE = 10000
+_MERGE_RATIO = 8
+
+# sorts after all characters, term + _MAX_CHAR is an upper bound of the words that start with term
+_MAX_CHAR = chr(0x10FFFF)
+
+
+def posting_doc(posting: int) -> int:
+    return (posting >> _DOC_SHIFT) & _DOC_MASK
+
+
+def posting_field(posting: int) -> int:
+    return posting >> _FIELD_SHIFT
+
+
+def posting_idx(posting: int) -> int:
+    # -1 for postings that do not refer to an item in the document
+    return (posting & _IDX_MASK) - 1
+
 
 class SearchIndex:
+    # Maps words to postings, with a separate partition for each field, so that a search in
+    # one field does not touch the words of the other fields. Documents and fields are
+    # identified by strings, they are numbered in the order they are added.
+
     def __init__(self):
-        self._index = {}
-        self._sorted = []
+        self._partitions = [_Partition()]
+        self._docs = []
+        self._doc_nos = {}
+        self._fields = [""]
         self._dirty = False
 
+    @property
+    def fields(self):
+        return tuple(self._fields)
+
+    def copy(self):
+        if self._dirty:
+            self.build()
+        index = SearchIndex()
+        index._partitions = [partition.copy() for partition in self._partitions]
+        index._docs = list(self._docs)
+        index._doc_nos = dict(self._doc_nos)
+        index._fields = list(self._fields)
+        return index
+
+    def posting(self, doc: str, field: str = "", idx: int = -1) -> int:
+        doc_no = self._doc_nos.get(doc)
+        if doc_no is None:
+            doc_no = self._doc_nos[doc] = len(self._docs)
+            self._docs.append(doc)
+        tag = self.field_tag(field)
+        if tag is None:
+            if len(self._fields) >= _MAX_FIELDS:
+                raise ValueError(f"Too many fields: '{field}'")
+            tag = len(self._fields)
+            self._fields.append(field)
+            self._partitions.append(_Partition())
+        if not -1 <= idx < _IDX_MASK:
+            raise ValueError(f"Index out of range: {idx}")
+        return tag << _FIELD_SHIFT | doc_no << _DOC_SHIFT | (idx + 1)
+
+    def doc(self, doc_no: int) -> str:
+        return self._docs[doc_no]
+
+    def doc_no(self, doc: str):
+        return self._doc_nos.get(doc)
+
+    def field_tag(self, field: str):
+        try:
+            return self._fields.index(field)
+        except ValueError:
+            return None
+
     def add(self, string: str, result: str):
-        for word in string.lower().split():
-            if len(word) > 1:
-                if word not in self._index:
-                    self._index[word] = set()
-                self._index[word].add(result)
-                self._dirty = True
+        self.add_posting(string, self._parse_result(result))
+
+    def remove(self, string: str, result: str):
+        self.remove_posting(string, self._parse_result(result))
+
+    def add_document(self, doc: str, entries: Iterable[Tuple[str, str, int]]):
+        # entries are tuples of string, field, and item index
+        for string, field, idx in entries:
+            self.add_posting(string, self.posting(doc, field, idx))
+
+    def remove_document(self, doc: str, entries: Iterable[Tuple[str, str, int]]):
+        # the entries must be the ones the document was added with
+        for string, field, idx in entries:
+            self.remove_posting(string, self.posting(doc, field, idx))
+
+    def replace_document(
+        self, doc: str, old_entries: Iterable[Tuple[str, str, int]], new_entries: Iterable[Tuple[str, str, int]]
+    ):
+        # entries that did not change cancel out in the delta
+        self.remove_document(doc, old_entries)
+        self.add_document(doc, new_entries)
+
+    def add_posting(self, string: str, posting: int):
+        if self._partitions[posting_field(posting)].add(string, posting):
+            self._dirty = True
+
+    def remove_posting(self, string: str, posting: int):
+        if self._partitions[posting_field(posting)].remove(string, posting):
+            self._dirty = True
 
     def build(self):
-        self._sorted = sorted(self._index.items(), key=lambda item: item[0])
+        for partition in self._partitions:
+            partition.build()
         self._dirty = False
-        logger.info(f"Built search index with {len(self._sorted)} words")
+        logger.info(f"Built search index with {sum(len(partition) for partition in self._partitions)} words")
 
     def find(self, term: str, exact=False) -> Set[str]:
+        return {self._format_result(posting) for posting in self.find_postings(term, exact=exact)}
+
+    def find_postings(self, term: str, exact=False, fields: Iterable[str] = None, docs: Set[int] = None) -> Set[int]:
+        # searches all fields if no fields are given, and all documents if no document numbers are given
         if self._dirty:
             self.build()
-        if exact:
-            result = self._find_exact(term)
-            return result if result else set()
+        if fields is None:
+            partitions = self._partitions
         else:
-            matches_for_term = self._find_startswith(term)
-            return set.union(matches_for_term) if matches_for_term else set()
-
-    def _find_exact(self, term):
-        low = 0
-        high = len(self._sorted) - 1
-        while low <= high:
-            pos = (low + high) // 2
-            if self._sorted[pos][0] == term:
-                return self._sorted[pos][1]
-            if term < self._sorted[pos][0]:
-                high = pos - 1
+            tags = (self.field_tag(field) for field in fields)
+            partitions = [self._partitions[tag] for tag in tags if tag is not None]
+        results = set()
+        for partition in partitions:
+            if docs is None:
+                for postings in partition.find(term, exact):
+                    results.update(postings)
             else:
-                low = pos + 1
-        return set()
+                results.update(partition.find_in_docs(term, exact, docs))
+        return results
 
-    def _find_startswith(self, term):
-        results = set()
-        low = 0
-        high = len(self._sorted) - 1
-        while low < high:
-            pos = (low + high) // 2
-            if self._sorted[pos][0] < term:
-                low = pos + 1
-            elif self._sorted[pos][0] > term:
-                high = pos - 1
+    def _parse_result(self, result: str):
+        # results have the form "doc[:field[:idx]]"
+        segments = result.split(":")
+        field = segments[1] if len(segments) > 1 else ""
+        idx = int(segments[2]) if len(segments) > 2 else -1
+        return self.posting(segments[0], field, idx)
+
+    def _format_result(self, posting: int):
+        segments = [self._docs[posting_doc(posting)]]
+        field = self._fields[posting_field(posting)]
+        idx = posting_idx(posting)
+        if field or idx >= 0:
+            segments.append(field)
+        if idx >= 0:
+            segments.append(str(idx))
+        return ":".join(segments)
+
+
+class _Partition:
+    # The words of a partition are kept in a sorted list. The postings of all words are
+    # concatenated in this order into a single array, with the offset of the postings of each
+    # word in a second array. The words starting with a prefix are a range of the sorted list,
+    # so their postings are a single slice of the array. The arrays are never modified, copies
+    # share them. Postings that are added or removed later are kept in a small delta of sets
+    # by word, so that an update costs time proportional to the update. The delta is merged
+    # into new arrays once it grows too large.
+
+    def __init__(self):
+        self._words = []
+        self._offsets = array("q", [0])
+        self._postings = array("q")
+        self._added = {}
+        self._removed = {}
+        self._added_words = []
+        self._removed_words = []
+        self._delta_size = 0
+        self._dirty = False
+
+    def __len__(self):
+        return len(self._words)
+
+    def copy(self):
+        partition = _Partition()
+        partition._words = self._words
+        partition._offsets = self._offsets
+        partition._postings = self._postings
+        partition._added = {word: set(postings) for word, postings in self._added.items()}
+        partition._removed = {word: set(postings) for word, postings in self._removed.items()}
+        partition._added_words = self._added_words
+        partition._removed_words = self._removed_words
+        partition._delta_size = self._delta_size
+        partition._dirty = self._dirty
+        return partition
+
+    def add(self, string: str, posting: int):
+        added = False
+        for word in string.lower().split():
+            if len(word) > 1:
+                removed = self._removed.get(word)
+                if removed and posting in removed:
+                    _discard(self._removed, word, posting)
+                    self._delta_size -= 1
+                elif posting not in self._added.get(word, ()) and not self._in_base(word, posting):
+                    self._added.setdefault(word, set()).add(posting)
+                    self._delta_size += 1
+                else:
+                    continue
+                added = self._dirty = True
+        return added
+
+    def remove(self, string: str, posting: int):
+        removed = False
+        for word in string.lower().split():
+            if posting in self._added.get(word, ()):
+                _discard(self._added, word, posting)
+                self._delta_size -= 1
+            elif posting not in self._removed.get(word, ()) and self._in_base(word, posting):
+                self._removed.setdefault(word, set()).add(posting)
+                self._delta_size += 1
             else:
-                low = pos
-                break
-        if low + 1 < len(self._sorted) and not self._sorted[low][0].startswith(term):
-            low += 1
-        while low < len(self._sorted) and self._sorted[low][0].startswith(term):
-            results |= self._sorted[low][1]
-            low += 1
+                continue
+            removed = self._dirty = True
+        return removed
+
+    def build(self):
+        if not self._dirty:
+            return
+        if self._delta_size > max(_MIN_MERGE_SIZE, len(self._postings) // _MERGE_RATIO):
+            self._merge()
+        self._added_words = sorted(self._added)
+        self._removed_words = sorted(self._removed)
+        self._dirty = False
+
+    def find(self, term: str, exact: bool) -> List[Iterable[int]]:
+        # expects the partition to be built, returns the postings in segments that may overlap
+        if exact:
+            low = bisect_left(self._words, term)
+            high = low + 1 if low < len(self._words) and self._words[low] == term else low
+            added = self._added.get(term)
+            segments = self._find_in_base(low, high, [term] if term in self._removed else [])
+            return segments + [added] if added else segments
+        end = term + _MAX_CHAR
+        low = bisect_left(self._words, term)
+        high = bisect_left(self._words, end, low)
+        removed_words = _words_in_range(self._removed_words, term, end)
+        segments = self._find_in_base(low, high, removed_words)
+        segments.extend(self._added[word] for word in _words_in_range(self._added_words, term, end))
+        return segments
+
+    def find_in_docs(self, term: str, exact: bool, docs: Set[int]) -> List[int]:
+        results = []
+        for postings in self.find(term, exact):
+            if exact and isinstance(postings, array) and len(postings) > len(docs):
+                # the postings of a word are sorted by document, each document is a range
+                base = postings[0] >> _FIELD_SHIFT << _FIELD_SHIFT
+                for doc in docs:
+                    low = bisect_left(postings, base | doc << _DOC_SHIFT)
+                    high = bisect_left(postings, base | (doc + 1) << _DOC_SHIFT, low)
+                    results.extend(postings[low:high])
+            else:
+                results.extend(posting for posting in postings if (posting >> _DOC_SHIFT) & _DOC_MASK in docs)
         return results
+
+    def _find_in_base(self, low: int, high: int, removed_words: List[str]):
+        # the postings of the words in [low, high), without the postings removed from some of these words
+        segments = []
+        start = low
+        for word in removed_words:
+            pos = bisect_left(self._words, word, start, high)
+            segments.append(self._postings[self._offsets[start] : self._offsets[pos]])
+            segments.append(set(self._postings[self._offsets[pos] : self._offsets[pos + 1]]) - self._removed[word])
+            start = pos + 1
+        segments.append(self._postings[self._offsets[start] : self._offsets[high]])
+        return [segment for segment in segments if segment]
+
+    def _in_base(self, word: str, posting: int):
+        pos = bisect_left(self._words, word)
+        if pos < len(self._words) and self._words[pos] == word:
+            low = bisect_left(self._postings, posting, self._offsets[pos], self._offsets[pos + 1])
+            return low < self._offsets[pos + 1] and self._postings[low] == posting
+        return False
+
+    def _merge(self):
+        words = []
+        offsets = array("q", [0])
+        postings = array("q")
+        for word in sorted(set(self._words).union(self._added)):
+            segments = self.find(word, exact=True) if word in self._added or word in self._removed else None
+            if segments is None:
+                pos = bisect_left(self._words, word)
+                postings.extend(self._postings[self._offsets[pos] : self._offsets[pos + 1]])
+            else:
+                merged = set().union(*segments)
+                if not merged:
+                    continue
+                postings.extend(sorted(merged))
+            words.append(word)
+            offsets.append(len(postings))
+        self._words = words
+        self._offsets = offsets
+        self._postings = postings
+        self._added = {}
+        self._removed = {}
+        self._delta_size = 0
+
+
+def _words_in_range(words: List[str], low: str, high: str):
+    return words[bisect_left(words, low) : bisect_left(words, high)]
+
+
+def _discard(postings_by_word: dict, word: str, posting: int):
+    postings = postings_by_word[word]
+    postings.discard(posting)
+    if not postings:
+        del postings_by_word[word]
@@ -0,0 +1,219 @@
+import logging
+import os
+import pickle
+import queue
+import threading
+from hashlib import md5
+from io import BytesIO
+from pathlib import Path
+from typing import Iterable, Mapping, Tuple
+
+from .index_files import AlbumIndex
+
+try:
+    from PIL import Image as PILImage
+except ImportError:
+    PILImage = None
+
+logger = logging.getLogger(__name__)
+
+# number of threads that render thumbnails in the background
+THUMBNAIL_THREADS = 2
+JPEG_QUALITY = 85
+
+# increment when the format of the digests file changes
+DIGESTS_VERSION = 1
+
+
+class Thumbnail:
+    __slots__ = ("file_name", "width", "height")
+
+    def __init__(self, file_name: str, width: int, height: int):
+        self.file_name = file_name
+        self.width = width
+        self.height = height
+
+
+class ThumbnailCache:
+    # Thumbnails of album covers are rendered by background threads and stored under the hash
+    # of the cover's content, so that albums with the same cover share them. The hashes are
+    # kept in a file by cover path, with the mtime and size of the cover, so that a restart
+    # only reads covers that have changed. Like in the model cache, entries remember the
+    # album they were made for, a replaced album gets new thumbnails.
+
+    @property
+    def enabled(self):
+        return bool(self._sizes) and PILImage is not None
+
+    def __init__(self, cache_dir: Path, sizes: Iterable[int], threads=THUMBNAIL_THREADS, digests_file: Path = None):
+        self._cache_dir = cache_dir
+        self._sizes = tuple(sorted(set(sizes)))
+        self._threads = threads
+        # album id to the album and its thumbnails, or None while they are rendered
+        self._entries = {}
+        # cover path to the mtime, size, and hash of the cover, loaded when the first cover is read
+        self._digests_file = digests_file
+        self._digests = None
+        self._digests_dirty = False
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._jobs = None
+        if self._sizes and PILImage is None:
+            logger.warning("Thumbnails are disabled, Pillow is not installed")
+
+    def get(self, album_id: str, album: AlbumIndex) -> Tuple[Thumbnail, ...]:
+        # returns the thumbnails that are ready, missing thumbnails are rendered in the background
+        if not album.cover or not self.enabled:
+            return ()
+        with self._lock:
+            entry = self._entries.get(album_id)
+            if entry and entry[0] is album:
+                return entry[1] or ()
+            self._entries[album_id] = (album, None)
+        self._submit(album_id, album)
+        return ()
+
+    def update(self, albums: Mapping[str, AlbumIndex], album_ids: Iterable[str] = None):
+        # renders the thumbnails of the given albums or of all albums ahead of requests
+        if not self.enabled:
+            return
+        if album_ids is None:
+            with self._lock:
+                for album_id in [album_id for album_id in self._entries if album_id not in albums]:
+                    del self._entries[album_id]
+                if self._digests:
+                    covers = {str(album.path / album.cover) for album in albums.values() if album.cover}
+                    for cover in [cover for cover in self._digests if cover not in covers]:
+                        del self._digests[cover]
+                        self._digests_dirty = True
+            album_ids = albums.keys()
+        for album_id in album_ids:
+            album = albums.get(album_id)
+            if album:
+                self.get(album_id, album)
+            else:
+                with self._lock:
+                    self._entries.pop(album_id, None)
+
+    def join(self):
+        # waits until all thumbnails that have been requested are rendered
+        if self._jobs:
+            self._jobs.join()
+
+    def _submit(self, album_id: str, album: AlbumIndex):
+        with self._lock:
+            if self._jobs is None:
+                self._cache_dir.mkdir(parents=True, exist_ok=True)
+                self._jobs = queue.Queue()
+                for _ in range(self._threads):
+                    threading.Thread(target=self._run_jobs, name="KitchenThumbnails", daemon=True).start()
+        self._jobs.put((album_id, album))
+
+    def _run_jobs(self):
+        while True:
+            album_id, album = self._jobs.get()
+            try:
+                self._render(album_id, album)
+                if self._jobs.empty():
+                    self._save_digests()
+            finally:
+                self._jobs.task_done()
+
+    def _render(self, album_id: str, album: AlbumIndex):
+        cover_path = album.path / album.cover
+        try:
+            thumbnails = self._make_thumbnails(cover_path)
+        except Exception as err:
+            logger.warning("Could not create thumbnails of '%s': %s", cover_path, err)
+            thumbnails = ()
+        with self._lock:
+            entry = self._entries.get(album_id)
+            if entry and entry[0] is album:
+                self._entries[album_id] = (album, thumbnails)
+
+    def _make_thumbnails(self, cover_path: Path):
+        data, digest = self._read_digest(cover_path)
+        thumbnails = []
+        image = None
+        # each size is scaled down from the next larger one
+        for size in reversed(self._sizes):
+            file_name = f"{digest}-{size}.jpg"
+            file_path = self._cache_dir / file_name
+            if file_path.exists():
+                # only the header is read to get the dimensions
+                with PILImage.open(file_path) as thumbnail:
+                    width, height = thumbnail.size
+            else:
+                if image is None:
+                    if data is None:
+                        data = _read_file(cover_path)
+                    image = _open_image(data, size)
+                image.thumbnail((size, size), PILImage.LANCZOS)
+                _save_image(image, file_path)
+                width, height = image.size
+            thumbnails.append(Thumbnail(file_name, width, height))
+        return tuple(reversed(thumbnails))
+
+    def _read_digest(self, cover_path: Path):
+        # returns the content of the cover if it had to be read to compute the hash
+        stat = os.stat(cover_path)
+        key = str(cover_path)
+        with self._lock:
+            if self._digests is None:
+                self._digests = self._load_digests()
+            entry = self._digests.get(key)
+        if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            return None, entry[2]
+        data = _read_file(cover_path)
+        digest = md5(data).hexdigest()
+        with self._lock:
+            self._digests[key] = (stat.st_mtime_ns, stat.st_size, digest)
+            self._digests_dirty = True
+        return data, digest
+
+    def _load_digests(self):
+        if not self._digests_file or not self._digests_file.exists():
+            return {}
+        try:
+            with open(self._digests_file, "rb") as f:
+                data = pickle.load(f)
+            if data.get("version") == DIGESTS_VERSION:
+                return data["digests"]
+        except Exception as err:
+            logger.warning("Could not read thumbnail digests '%s': %s", self._digests_file, err)
+        return {}
+
+    def _save_digests(self):
+        # the file is written outside of the lock, so that requests are not blocked
+        with self._save_lock:
+            with self._lock:
+                if not self._digests_dirty or not self._digests_file:
+                    return
+                data = {"version": DIGESTS_VERSION, "digests": dict(self._digests)}
+                self._digests_dirty = False
+            tmp_path = self._digests_file.with_name(self._digests_file.name + ".tmp")
+            try:
+                with open(tmp_path, "wb") as f:
+                    pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, self._digests_file)
+            except Exception as err:
+                logger.warning("Could not write thumbnail digests '%s': %s", self._digests_file, err)
+
+
+def _read_file(file_path: Path):
+    with open(file_path, "rb") as f:
+        return f.read()
+
+
+def _open_image(data: bytes, size: int):
+    image = PILImage.open(BytesIO(data))
+    # JPEG images can be decoded at a fraction of their size, which is much faster
+    image.draft("RGB", (size, size))
+    return image.convert("RGB")
+
+
+def _save_image(image, file_path: Path):
+    # write to a temporary file first, readers never see incomplete files
+    tmp_path = file_path.with_name(f"{file_path.name}.{threading.get_ident()}.tmp")
+    image.save(tmp_path, "JPEG", quality=JPEG_QUALITY)
+    os.replace(tmp_path, file_path)
@@ -1,5 +1,7 @@
 import re
 
+_ALBUM_URI_PREFIX = "kitchen:album:"
+
 
 def parse_uri(uri: str):
     if uri.startswith("kitchen:"):
@@ -25,6 +27,13 @@ def parse_uri(uri: str):
                 raise ValueError(f"Invalid kitchen URI '{uri}': {str(error)}")
 
 
+def parse_album_id(uri: str):
+    # fast path for URIs of albums and album tracks that only extracts the album id,
+    # the rest of the URI is not validated
+    if uri.startswith(_ALBUM_URI_PREFIX):
+        return uri[len(_ALBUM_URI_PREFIX) :].split(":", 1)[0]
+
+
 def _parse_root_uri(segments):
     if not segments:
         return ROOT_URI
@@ -33,6 +42,15 @@ def _parse_root_uri(segments):
 def _parse_albums_uri(segments):
     if not segments:
         return AlbumsUri()
+    if segments == ["letters"]:
+        return AlbumLettersUri()
+    if len(segments) == 2 and segments[0] == "page":
+        page = _check_page(segments[1])
+        return AlbumsPageUri(page)
+    if len(segments) in (2, 3) and segments[0] == "letter":
+        letter = _check_letter(segments[1])
+        page = _check_page(segments[2]) if len(segments) == 3 else 1
+        return AlbumsLetterUri(letter, page)
 
 
 def _parse_stations_uri(segments):
@@ -83,6 +101,19 @@ def _check_number(segment: str):
     return int(segment)
 
 
+def _check_page(segment: str):
+    if not re.match("^[1-9][0-9]*$", segment):
+        raise ValueError(f"Invalid page '{segment}'")
+    return int(segment)
+
+
+def _check_letter(segment: str):
+    # "0" stands for all names that do not start with a letter
+    if not re.match("^[a-z0]$", segment):
+        raise ValueError(f"Invalid letter '{segment}'")
+    return segment
+
+
 class KitchenUri:
     def __init__(self, uri: str):
         self.uri = uri
@@ -110,6 +141,25 @@ class AlbumsUri(KitchenUri):
         super().__init__("kitchen:albums")
 
 
+class AlbumsPageUri(KitchenUri):
+    def __init__(self, page: int):
+        super().__init__("kitchen:albums:page:%d" % page)
+        self.page = page
+
+
+class AlbumLettersUri(KitchenUri):
+    def __init__(self):
+        super().__init__("kitchen:albums:letters")
+
+
+class AlbumsLetterUri(KitchenUri):
+    def __init__(self, letter: str, page: int = 1):
+        uri = "kitchen:albums:letter:%s" % letter if page == 1 else "kitchen:albums:letter:%s:%d" % (letter, page)
+        super().__init__(uri)
+        self.letter = letter
+        self.page = page
+
+
 class StationsUri(KitchenUri):
     def __init__(self):
         super().__init__("kitchen:stations")
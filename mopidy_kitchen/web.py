@@ -3,13 +3,19 @@ from pathlib import Path
 import tornado.web
 
 from . import Extension
+from .album_routes import AlbumRoutes, get_album_routes
 
 
 def webapp_factory(config, core):
-    albums_dir = Extension.get_albums_dir(config)
     www_dir = Path(__file__).parent / "www"
+    if config[Extension.ext_name]["album_links"]:
+        albums_handler = (r"/albums/(.+)", FileHandler, {"path": Extension.get_albums_dir(config)})
+    else:
+        routes = get_album_routes(Extension.get_data_dir(config))
+        albums_handler = (r"/albums/([^/]+)/(.+)", AlbumFileHandler, {"routes": routes})
     return [
-        (r"/albums/(.+)", FileHandler, {"path": albums_dir}),
+        albums_handler,
+        (r"/thumbnails/(.+)", FileHandler, {"path": Extension.get_thumbnails_dir(config)}),
         (r"/(.*)", FileHandler, {"path": www_dir}),
     ]
 
@@ -17,3 +23,21 @@ def webapp_factory(config, core):
 class FileHandler(tornado.web.StaticFileHandler):
     def parse_url_path(self, url_path: str) -> str:
         return super().parse_url_path(url_path or "index.html")
+
+
+class AlbumFileHandler(tornado.web.StaticFileHandler):
+    # serves the files of an album from the directory that the album id resolves to,
+    # the root of the handler is set for each request
+    def initialize(self, routes: AlbumRoutes):
+        super().initialize(path="")
+        self._routes = routes
+
+    def head(self, album_id: str, path: str):
+        return self.get(album_id, path, include_body=False)
+
+    async def get(self, album_id: str, path: str, include_body=True):
+        album_path = self._routes.resolve(album_id)
+        if album_path is None:
+            raise tornado.web.HTTPError(404)
+        self.root = str(album_path)
+        await super().get(path, include_body=include_body)
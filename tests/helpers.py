@@ -2,14 +2,26 @@ from pathlib import Path
 import json
 
 
-def make_config(tmp_path: Path):
+def make_config(tmp_path: Path, **kitchen_config):
     data_dir = tmp_path.joinpath("data")
     data_dir.mkdir(exist_ok=True)
     media_dir = tmp_path.joinpath("media")
     media_dir.mkdir(exist_ok=True)
     return {
         "core": {"data_dir": str(data_dir)},
-        "kitchen": {"media_dir": str(media_dir)},
+        "kitchen": {
+            "media_dir": str(media_dir),
+            "scan_threads": 1,
+            "scan_cache": True,
+            "scan_in_background": False,
+            "lazy_tracks": False,
+            "browse_page_size": 100,
+            "search_max_results": 500,
+            "album_links": True,
+            "cover_names": ["cover.jpg"],
+            "thumbnail_sizes": [],
+            **kitchen_config,
+        },
     }
 
 
@@ -0,0 +1,36 @@
+from mopidy_kitchen.album_routes import AlbumRoutes, get_album_routes
+from mopidy_kitchen.index_files import AlbumIndex
+
+
+def test_resolve_empty():
+    routes = AlbumRoutes()
+
+    assert routes.resolve("foo") is None
+
+
+def test_resolve_published_albums(tmp_path):
+    routes = AlbumRoutes()
+    album = AlbumIndex({"name": "foo"}, tmp_path / "foo")
+
+    routes.publish({album.id: album})
+
+    assert len(routes) == 1
+    assert routes.resolve(album.id) == tmp_path / "foo"
+    assert routes.resolve("bar") is None
+
+
+def test_resolve_albums_published_last(tmp_path):
+    routes = AlbumRoutes()
+    album = AlbumIndex({"name": "foo"}, tmp_path / "foo")
+    routes.publish({album.id: album})
+
+    routes.publish({})
+
+    assert routes.resolve(album.id) is None
+
+
+def test_get_album_routes_is_shared_per_data_dir(tmp_path):
+    routes = get_album_routes(tmp_path / "data1")
+
+    assert get_album_routes(tmp_path / "data1") is routes
+    assert get_album_routes(tmp_path / "data2") is not routes
@@ -0,0 +1,249 @@
+import logging
+from pathlib import Path
+
+from pytest import raises
+
+from mopidy_kitchen import catalog as catalog_module
+from mopidy_kitchen import index_files
+from mopidy_kitchen.catalog import Catalog
+from mopidy_kitchen.index_files import AlbumIndex, StationIndex
+
+from .helpers import make_album as write_album
+
+
+def test_put_album():
+    catalog = Catalog()
+    album = make_album("foo", title="One Day")
+
+    result = catalog.put_album(album, set())
+    catalog.freeze()
+
+    assert result is True
+    assert catalog.albums == {album.id: album}
+    assert catalog.index.find("day") == {f"{album.id}:album"}
+
+
+def test_put_album_unchanged():
+    catalog = Catalog()
+    album = make_album("foo")
+    catalog.put_album(album, set())
+
+    result = catalog.put_album(album, set())
+
+    assert result is False
+
+
+def test_put_album_modified():
+    catalog = Catalog()
+    catalog.put_album(make_album("foo", title="One Day"), set())
+    album = make_album("foo", title="Another Day")
+
+    result = catalog.put_album(album, set())
+    catalog.freeze()
+
+    assert result is True
+    assert catalog.albums == {album.id: album}
+    assert catalog.index.find("one") == set()
+    assert catalog.index.find("another") == {f"{album.id}:album"}
+
+
+def test_put_album_duplicate(caplog):
+    catalog = Catalog()
+    seen = set()
+    album1 = make_album("foo", path="/media/b")
+    album2 = make_album("foo", path="/media/a")
+    album3 = make_album("foo", path="/media/c")
+
+    catalog.put_album(album1, seen)
+    catalog.put_album(album2, seen)
+    catalog.put_album(album3, seen)
+
+    assert catalog.albums == {album2.id: album2}
+    assert [record.levelno for record in caplog.records] == [logging.WARNING, logging.WARNING]
+    assert [record.getMessage() for record in caplog.records] == [
+        "Duplicate albums: '/media/b' and '/media/a'",
+        "Duplicate albums: '/media/c' and '/media/a'",
+    ]
+
+
+def test_remove_album():
+    catalog = Catalog()
+    album = make_album("foo", title="One Day")
+    catalog.put_album(album, set())
+
+    catalog.remove_album(album.id)
+    catalog.freeze()
+
+    assert catalog.albums == {}
+    assert catalog.index.find("day") == set()
+
+
+def test_put_album_releases_tracks_of_replaced_album(tmp_path):
+    write_album(tmp_path, {"name": "foo", "tracks": [{"path": "01.ogg"}]})
+    album = AlbumIndex.read_from_file(tmp_path / "index.json", lazy=True)
+    catalog = Catalog()
+    catalog.put_album(album, set())
+    album.tracks
+
+    catalog.put_album(AlbumIndex.read_from_file(tmp_path / "index.json", lazy=True), set())
+
+    assert index_files._tracks_cache.get(album) is None
+
+
+def test_remove_album_releases_tracks(tmp_path):
+    write_album(tmp_path, {"name": "foo", "tracks": [{"path": "01.ogg"}]})
+    album = AlbumIndex.read_from_file(tmp_path / "index.json", lazy=True)
+    catalog = Catalog()
+    catalog.put_album(album, set())
+    album.tracks
+
+    catalog.remove_album(album.id)
+
+    assert index_files._tracks_cache.get(album) is None
+
+
+def test_put_and_remove_station():
+    catalog = Catalog()
+    station = StationIndex({"name": "Radio 1", "stream": "http://radio1.com/stream"}, Path("/media/r1"))
+
+    catalog.put_station(station, set())
+    assert catalog.stations == {station.id: station}
+    assert catalog.index.find("radio") == {f"kitchen:station:{station.id}:station"}
+
+    catalog.remove_station(station.id)
+    assert catalog.stations == {}
+    assert catalog.index.find("radio") == set()
+
+
+def test_freeze_sorts_by_name():
+    catalog = Catalog()
+    catalog.put_album(make_album("b"), set())
+    catalog.put_album(make_album("c"), set())
+    catalog.put_album(make_album("a"), set())
+
+    catalog.freeze()
+
+    assert [ref.name for ref in catalog.album_refs] == ["a", "b", "c"]
+
+
+def test_freeze_updates_changed_refs():
+    catalog = Catalog()
+    for name in ("b", "d", "Édith", "1st"):
+        catalog.put_album(make_album(name), set())
+    catalog.freeze()
+    unchanged = catalog.album_refs[0]
+    catalog = catalog.copy()
+    catalog.put_album(make_album("c"), set())
+    catalog.remove_album(make_album("d").id)
+    catalog.put_album(make_album("a"), set())
+
+    catalog.freeze()
+
+    assert [ref.name for ref in catalog.album_refs] == ["1st", "a", "b", "c", "Édith"]
+    assert catalog.album_refs[0] is unchanged
+    assert {letter: [ref.name for ref in refs] for letter, refs in catalog.album_letters.items()} == {
+        "0": ["1st"],
+        "a": ["a"],
+        "b": ["b"],
+        "c": ["c"],
+        "e": ["Édith"],
+    }
+
+
+def test_freeze_merges_many_changes(monkeypatch):
+    monkeypatch.setattr(catalog_module, "_MAX_INSERTS", 1)
+    catalog = Catalog()
+    for name in ("b", "d", "f"):
+        catalog.put_album(make_album(name), set())
+    catalog.freeze()
+    catalog = catalog.copy()
+    for name in ("e", "a", "c"):
+        catalog.put_album(make_album(name), set())
+    catalog.remove_album(make_album("d").id)
+
+    catalog.freeze()
+
+    assert [ref.name for ref in catalog.album_refs] == ["a", "b", "c", "e", "f"]
+    assert [ref.name for ref in catalog.album_letters["e"]] == ["e"]
+    assert "d" not in catalog.album_letters
+
+
+def test_freeze_builds_refs():
+    catalog = Catalog()
+    album = make_album("b")
+    station = StationIndex({"name": "Radio 1", "stream": "http://radio1.com/stream"}, Path("/media/r1"))
+    catalog.put_album(album, set())
+    catalog.put_album(make_album("a"), set())
+    catalog.put_station(station, set())
+
+    catalog.freeze()
+
+    assert [ref.name for ref in catalog.album_refs] == ["a", "b"]
+    assert catalog.album_refs[1].uri == f"kitchen:album:{album.id}"
+    assert [ref.uri for ref in catalog.station_refs] == [f"kitchen:station:{station.id}"]
+
+
+def test_copy_shares_refs_until_modified():
+    catalog = Catalog()
+    catalog.put_album(make_album("foo"), set())
+    catalog.freeze()
+
+    copy = catalog.copy()
+    copy.freeze()
+
+    assert copy.album_refs is catalog.album_refs
+    modified = catalog.copy()
+    modified.put_album(make_album("bar"), set())
+    modified.freeze()
+    assert [ref.name for ref in modified.album_refs] == ["bar", "foo"]
+    assert [ref.name for ref in catalog.album_refs] == ["foo"]
+
+
+def test_copy_is_independent():
+    catalog = Catalog()
+    album = make_album("foo", title="One Day")
+    catalog.put_album(album, set())
+    catalog.freeze()
+
+    copy = catalog.copy()
+    copy.remove_album(album.id)
+    copy.freeze()
+
+    assert catalog.albums == {album.id: album}
+    assert catalog.index.find("day") == {f"{album.id}:album"}
+    assert copy.albums == {}
+    assert copy.index.find("day") == set()
+
+
+def test_copy_shares_data_until_modified():
+    catalog = Catalog()
+    catalog.put_album(make_album("foo"), set())
+    catalog.freeze()
+
+    copy = catalog.copy()
+
+    assert copy.index is catalog.index
+    copy.put_album(make_album("bar"), set())
+    assert copy.index is not catalog.index
+    assert len(catalog.albums) == 1
+
+
+def test_frozen_catalog_cannot_be_modified():
+    catalog = Catalog()
+    catalog.freeze()
+
+    with raises(RuntimeError) as ex_info:
+        catalog.put_album(make_album("foo"), set())
+
+    assert str(ex_info.value) == "Catalog is frozen"
+
+
+def test_albums_are_read_only():
+    catalog = Catalog()
+
+    with raises(TypeError):
+        catalog.albums["foo"] = make_album("foo")
+
+
+def make_album(name, title="", path="/media/a"):
+    return AlbumIndex({"name": name, "title": title}, Path(path))
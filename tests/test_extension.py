@@ -19,3 +19,21 @@ def test_get_config_schema():
 
     assert "media_dir" in schema
     assert type(schema.get("media_dir")) == config.Path
+    assert "scan_threads" in schema
+    assert type(schema.get("scan_threads")) == config.Integer
+    assert "scan_cache" in schema
+    assert type(schema.get("scan_cache")) == config.Boolean
+    assert "scan_in_background" in schema
+    assert type(schema.get("scan_in_background")) == config.Boolean
+    assert "lazy_tracks" in schema
+    assert type(schema.get("lazy_tracks")) == config.Boolean
+    assert "browse_page_size" in schema
+    assert type(schema.get("browse_page_size")) == config.Integer
+    assert "search_max_results" in schema
+    assert type(schema.get("search_max_results")) == config.Integer
+    assert "album_links" in schema
+    assert type(schema.get("album_links")) == config.Boolean
+    assert "cover_names" in schema
+    assert type(schema.get("cover_names")) == config.List
+    assert "thumbnail_sizes" in schema
+    assert type(schema.get("thumbnail_sizes")) == config.List
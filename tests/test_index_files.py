@@ -1,3 +1,5 @@
+import pickle
+
 from pytest import raises
 
 from mopidy_kitchen.index_files import AlbumIndex, IndexFileError
@@ -62,13 +64,21 @@ def test_read_album_path(tmp_path):
     assert result.path == tmp_path
 
 
+def test_read_album_id(tmp_path):
+    make_album(tmp_path, {"name": "John Doe - One Day"})
+
+    result = AlbumIndex.read_from_file(tmp_path / "index.json")
+
+    assert result.id == "95506c273e4ecb0333d19824d66ab586"
+
+
 def test_read_album_defaults(tmp_path):
     make_album(tmp_path, '{"name": "foo"}')
 
     result = AlbumIndex.read_from_file(tmp_path / "index.json")
 
     assert result.title == ""
-    assert result.artists == []
+    assert result.artists == ()
     assert result.musicbrainz_id == ""
 
 
@@ -135,13 +145,35 @@ def test_read_with_multiple_discs_with_path(tmp_path):
     assert result.tracks[2].path == tmp_path / "02/02.ogg"
 
 
+def test_get_track(tmp_path):
+    index = {
+        "name": "John Doe - One Day",
+        "discs": [
+            {"path": "01", "tracks": [{"path": "01.ogg"}, {"path": "02.ogg"}]},
+            {"path": "02", "tracks": []},
+            {"path": "03", "tracks": [{"path": "01.ogg"}]},
+        ],
+    }
+    make_album(tmp_path, index)
+
+    result = AlbumIndex.read_from_file(tmp_path / "index.json")
+
+    assert result.get_track(1, 2).path == tmp_path / "01/02.ogg"
+    assert result.get_track(3, 1).path == tmp_path / "03/01.ogg"
+    assert result.get_track(1, 3) is None
+    assert result.get_track(2, 1) is None
+    assert result.get_track(4, 1) is None
+    assert result.get_track(0, 1) is None
+    assert result.get_track(1, 0) is None
+
+
 def test_read_track_defaults(tmp_path):
     make_album(tmp_path, '{"name": "foo", "tracks": [{"path": "01.ogg"}]}')
 
     result = AlbumIndex.read_from_file(tmp_path / "index.json")
 
     assert result.tracks[0].title == ""
-    assert result.tracks[0].artists == []
+    assert result.tracks[0].artists == ()
     assert result.tracks[0].musicbrainz_id == ""
 
 
@@ -225,9 +257,170 @@ def test_read_with_complete_metadata(tmp_path):
     result = AlbumIndex.read_from_file(tmp_path / "index.json")
 
     assert result.title == "One Day"
-    assert result.artists == ["John Doe"]
+    assert result.artists == ("John Doe",)
     assert result.musicbrainz_id == "000-0"
     assert result.tracks[0].title == "Another Dreadful Morning"
-    assert result.tracks[0].artists == ["John Doe"]
+    assert result.tracks[0].artists == ("John Doe",)
     assert result.tracks[0].musicbrainz_id == "000-1"
     assert result.tracks[0].duration_ms == 101000
+
+
+def test_read_shares_artists(tmp_path):
+    index = {
+        "name": "John Doe - One Day",
+        "artist": "John Doe",
+        "tracks": [{"path": "01.ogg", "artist": "John Doe"}, {"path": "02.ogg", "artist": "John Doe"}],
+    }
+    make_album(tmp_path, index)
+
+    result = AlbumIndex.read_from_file(tmp_path / "index.json")
+
+    assert result.tracks[0].artists is result.artists
+    assert result.tracks[1].artists is result.artists
+
+
+def test_read_shares_artists_of_albums_with_same_table(tmp_path):
+    make_album(tmp_path / "a", {"name": "foo", "artist": "John Doe"})
+    make_album(tmp_path / "b", {"name": "bar", "artist": "John Doe"})
+    artist_table = {}
+
+    album1 = AlbumIndex.read_from_file(tmp_path / "a" / "index.json", artist_table=artist_table)
+    album2 = AlbumIndex.read_from_file(tmp_path / "b" / "index.json", artist_table=artist_table)
+    album3 = AlbumIndex.read_from_file(tmp_path / "b" / "index.json")
+
+    assert album1.artists is album2.artists
+    assert album3.artists == album1.artists
+    assert album3.artists is not album1.artists
+
+
+def test_read_creates_compact_tracks(tmp_path):
+    make_album(tmp_path, {"name": "foo", "tracks": [{"path": "01.ogg"}]})
+
+    result = AlbumIndex.read_from_file(tmp_path / "index.json")
+
+    assert not hasattr(result, "__dict__")
+    assert not hasattr(result.tracks[0], "__dict__")
+
+
+def test_read_lazy(tmp_path):
+    index = {
+        "name": "John Doe - One Day",
+        "discs": [
+            {"tracks": [{"path": "01.ogg", "title": "One", "artist": "John Doe"}]},
+            {"tracks": [{"path": "02.ogg", "title": "Two"}]},
+        ],
+    }
+    make_album(tmp_path, index)
+
+    result = AlbumIndex.read_from_file(tmp_path / "index.json", lazy=True)
+
+    assert result.num_tracks == 2
+    assert result.num_discs == 2
+    assert result.track_titles == ("One", "Two")
+    assert result.track_artists == (("John Doe",), ())
+    assert [track.title for track in result.tracks] == ["One", "Two"]
+
+
+def test_read_lazy_validates_tracks(tmp_path):
+    make_album(tmp_path, '{"name": "foo", "tracks": [{"length": 101}]}')
+
+    with raises(IndexFileError) as ex_info:
+        AlbumIndex.read_from_file(tmp_path / "index.json", lazy=True)
+
+    assert (
+        str(ex_info.value)
+        == f"Invalid index format in '{tmp_path}/index.json': Attribute 'path' is missing in track 1 of disc 1"
+    )
+
+
+def test_lazy_album_loads_tracks_on_demand(tmp_path):
+    make_album(tmp_path, {"name": "foo", "tracks": [{"path": "01.ogg", "title": "One"}]})
+    album = AlbumIndex.read_from_file(tmp_path / "index.json", lazy=True)
+    loaded = pickle.loads(pickle.dumps(album))
+
+    result = loaded.tracks
+
+    assert [track.title for track in result] == ["One"]
+    assert result[0].path == tmp_path / "01.ogg"
+    assert loaded.tracks is result
+
+
+def test_lazy_album_with_missing_index_file(tmp_path, caplog):
+    make_album(tmp_path, {"name": "foo", "tracks": [{"path": "01.ogg", "title": "One"}]})
+    album = pickle.loads(pickle.dumps(AlbumIndex.read_from_file(tmp_path / "index.json", lazy=True)))
+    (tmp_path / "index.json").unlink()
+
+    result = album.tracks
+
+    assert result == ()
+    assert caplog.records[0].getMessage().startswith("Could not load tracks of album 'foo'")
+
+
+def test_lazy_album_with_changed_index_file(tmp_path, caplog):
+    make_album(tmp_path, {"name": "foo", "tracks": [{"path": "01.ogg"}, {"path": "02.ogg"}]})
+    album = AlbumIndex.read_from_file(tmp_path / "index.json", lazy=True)
+    make_album(tmp_path, {"name": "foo", "tracks": [{"path": "01.ogg"}]})
+
+    assert album.tracks == ()
+    assert album.get_track(1, 2) is None
+    assert caplog.records[0].getMessage() == "Could not load tracks of album 'foo': tracks have changed since the scan"
+
+
+def test_lazy_album_is_not_cached_while_unavailable(tmp_path, caplog):
+    make_album(tmp_path, {"name": "foo", "tracks": [{"path": "01.ogg", "title": "One"}]})
+    album = AlbumIndex.read_from_file(tmp_path / "index.json", lazy=True)
+    (tmp_path / "index.json").rename(tmp_path / "moved.json")
+    assert album.tracks == ()
+
+    (tmp_path / "moved.json").rename(tmp_path / "index.json")
+
+    assert [track.title for track in album.tracks] == ["One"]
+
+
+def test_read_counts_empty_discs(tmp_path):
+    make_album(tmp_path, {"name": "foo", "discs": [{"tracks": [{"path": "01.ogg"}]}, {"tracks": []}]})
+
+    result = AlbumIndex.read_from_file(tmp_path / "index.json")
+
+    assert result.num_discs == 2
+    assert result.get_track_idx(1, 1) == 0
+    assert result.get_track_idx(2, 1) is None
+
+
+def test_read_lazy_counts_empty_discs(tmp_path, caplog):
+    make_album(tmp_path, {"name": "foo", "discs": [{"tracks": [{"path": "01.ogg"}]}, {"tracks": []}]})
+
+    result = AlbumIndex.read_from_file(tmp_path / "index.json", lazy=True)
+
+    assert result.num_discs == 2
+    assert result.get_track(1, 1).path == tmp_path / "01.ogg"
+    assert caplog.text == ""
+
+
+def test_read_lazy_validates_length(tmp_path):
+    make_album(tmp_path, {"name": "foo", "tracks": [{"path": "01.ogg", "length": -3}]})
+
+    with raises(IndexFileError) as ex_info:
+        AlbumIndex.read_from_file(tmp_path / "index.json", lazy=True)
+
+    assert str(ex_info.value).endswith("Attribute 'length' in track 1 of disc 1 is negative")
+
+
+def test_read_lazy_validates_musicbrainz_id(tmp_path):
+    make_album(tmp_path, {"name": "foo", "tracks": [{"path": "01.ogg", "musicbrainz_id": 1}]})
+
+    with raises(IndexFileError) as ex_info:
+        AlbumIndex.read_from_file(tmp_path / "index.json", lazy=True)
+
+    assert str(ex_info.value).endswith("Attribute 'musicbrainz_id' in track 1 of disc 1 is not a string")
+
+
+def test_release_drops_loaded_tracks(tmp_path):
+    make_album(tmp_path, {"name": "foo", "tracks": [{"path": "01.ogg", "title": "One"}]})
+    album = AlbumIndex.read_from_file(tmp_path / "index.json", lazy=True)
+    tracks = album.tracks
+
+    album.release()
+
+    assert album.tracks is not tracks
+    assert [track.title for track in album.tracks] == ["One"]
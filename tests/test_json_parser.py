@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from mopidy_kitchen import json_parser
+from mopidy_kitchen.json_parser import parse_json, read_json_file
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(json_parser, "orjson", None)
+    elif json_parser.orjson is None:
+        pytest.skip("orjson is not installed")
+    return request.param
+
+
+def test_parse_json(backend):
+    result = parse_json(b'{"name": "Foo", "tracks": [{"length": 1.5}]}')
+
+    assert result == {"name": "Foo", "tracks": [{"length": 1.5}]}
+
+
+def test_parse_json_utf8(backend):
+    result = parse_json('{"name": "Für Elise"}'.encode())
+
+    assert result == {"name": "Für Elise"}
+
+
+def test_parse_json_other_encodings(backend):
+    assert parse_json('\ufeff{"name": "Foo"}'.encode("utf-8")) == {"name": "Foo"}
+    assert parse_json('{"name": "Foo"}'.encode("utf-16")) == {"name": "Foo"}
+
+
+def test_parse_json_invalid(backend):
+    with pytest.raises(json.JSONDecodeError) as ex_info:
+        parse_json(b'{"name": "Foo",\n  "title": }')
+
+    assert (ex_info.value.msg, ex_info.value.lineno, ex_info.value.colno) == ("Expecting value", 2, 12)
+
+
+def test_read_json_file(backend, tmp_path):
+    (tmp_path / "index.json").write_text('{"name": "Foo"}')
+
+    result = read_json_file(tmp_path / "index.json")
+
+    assert result == {"name": "Foo"}
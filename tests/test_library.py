@@ -1,8 +1,16 @@
 import logging
+import threading
+import time
+
+import pytest
 
 from mopidy.models import Album, Image, Ref, SearchResult, Track
 
+from mopidy_kitchen import library
+from mopidy_kitchen.album_routes import get_album_routes
+from mopidy_kitchen.hash import make_hash
 from mopidy_kitchen.library import KitchenLibraryProvider
+from mopidy_kitchen.scan_cache import ScanCache
 from mopidy_kitchen.uri import AlbumsUri, parse_uri
 
 from .helpers import EXAMPLE_ALBUM, make_album, make_config, make_image, make_station
@@ -23,6 +31,277 @@ def test_detects_duplicates(tmp_path, caplog):
     )
 
 
+def test_detects_duplicates_with_parallel_scan(tmp_path, caplog):
+    make_album(tmp_path / "media" / "foo", EXAMPLE_ALBUM)
+    make_album(tmp_path / "media" / "bar", EXAMPLE_ALBUM)
+
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path, scan_threads=4))
+
+    assert len(provider.browse(str(AlbumsUri()))) == 1
+    assert len(caplog.records) == 1
+    assert caplog.records[0].getMessage() == f"Duplicate albums: '{tmp_path}/media/foo' and '{tmp_path}/media/bar'"
+
+
+def test_writes_scan_cache(tmp_path, caplog):
+    make_album(tmp_path / "media" / "a1", EXAMPLE_ALBUM)
+
+    KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+
+    assert caplog.text == ""
+    assert (tmp_path / "data" / "kitchen" / "scan-cache.pickle").is_file()
+
+
+def test_starts_from_scan_cache(tmp_path, caplog):
+    make_album(tmp_path / "media" / "a1", EXAMPLE_ALBUM)
+    KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+
+    assert caplog.text == ""
+    assert [ref.name for ref in provider.browse(str(AlbumsUri()))] == ["John Doe - One Day"]
+
+
+def test_scan_cache_disabled(tmp_path, caplog):
+    make_album(tmp_path / "media" / "a1", EXAMPLE_ALBUM)
+
+    KitchenLibraryProvider(backend={}, config=make_config(tmp_path, scan_cache=False))
+
+    assert caplog.text == ""
+    assert not (tmp_path / "data" / "kitchen" / "scan-cache.pickle").exists()
+
+
+def test_initialize_in_background(tmp_path, caplog):
+    make_album(tmp_path / "media" / "a1", EXAMPLE_ALBUM)
+
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path, scan_in_background=True))
+    wait_until_ready(provider)
+
+    assert caplog.text == ""
+    assert provider.status == {
+        "ready": True,
+        "scanning": False,
+        "scanned": 1,
+        "albums": 1,
+        "stations": 0,
+        "search_cache_hits": 0,
+        "search_cache_misses": 0,
+    }
+    assert [ref.name for ref in provider.browse(str(AlbumsUri()))] == ["John Doe - One Day"]
+
+
+def test_initialize_in_background_loads_scan_cache_on_worker(tmp_path, caplog, monkeypatch):
+    make_album(tmp_path / "media" / "a1", EXAMPLE_ALBUM)
+    KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+    threads = []
+    load = ScanCache.load
+
+    def spy_load(cache):
+        threads.append(threading.current_thread().name)
+        load(cache)
+
+    monkeypatch.setattr(ScanCache, "load", spy_load)
+
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path, scan_in_background=True))
+    wait_until_ready(provider)
+
+    assert caplog.text == ""
+    assert threads == ["KitchenLibrary"]
+    assert [ref.name for ref in provider.browse(str(AlbumsUri()))] == ["John Doe - One Day"]
+
+
+def test_initialize_in_background_from_scan_cache(tmp_path, caplog):
+    make_album(tmp_path / "media" / "a1", {"name": "test1"})
+    make_album(tmp_path / "media" / "a2", {"name": "test2"})
+    KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+    (tmp_path / "media" / "a2" / "index.json").unlink()
+
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path, scan_in_background=True))
+    wait_until_ready(provider)
+
+    assert caplog.text == ""
+    assert [ref.name for ref in provider.browse(str(AlbumsUri()))] == ["test1"]
+    assert not (tmp_path / "data" / "kitchen" / "albums" / make_hash("test2")).is_symlink()
+
+
+def test_initialize_in_background_publishes_snapshots(tmp_path, caplog, monkeypatch):
+    for n in range(3):
+        make_album(tmp_path / "media" / f"a{n}", {"name": f"test{n}"})
+    monkeypatch.setattr(library, "PUBLISH_INTERVAL", 0)
+    published = []
+    publish = KitchenLibraryProvider._publish
+
+    def spy_publish(provider, catalog, album_ids=None):
+        publish(provider, catalog, album_ids)
+        published.append(len(provider.browse(str(AlbumsUri()))))
+
+    monkeypatch.setattr(KitchenLibraryProvider, "_publish", spy_publish)
+
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path, scan_in_background=True))
+    wait_until_ready(provider)
+
+    assert caplog.text == ""
+    assert published == [1, 2, 3, 3]
+
+
+def test_background_snapshots_keep_album_links(tmp_path, caplog, monkeypatch):
+    for n in range(5):
+        make_album(tmp_path / "media" / f"a{n}", {"name": f"test{n}"})
+    config = make_config(tmp_path, scan_cache=False, scan_in_background=True)
+    wait_until_ready(KitchenLibraryProvider(backend={}, config=config))
+    albums_dir = tmp_path / "data" / "kitchen" / "albums"
+    inodes = {path.name: path.lstat().st_ino for path in albums_dir.iterdir()}
+    monkeypatch.setattr(library, "PUBLISH_INTERVAL", 0)
+
+    wait_until_ready(KitchenLibraryProvider(backend={}, config=config))
+
+    assert caplog.text == ""
+    assert {path.name: path.lstat().st_ino for path in albums_dir.iterdir()} == inodes
+
+
+def test_initialize_in_foreground_publishes_once(tmp_path, caplog, monkeypatch):
+    for n in range(3):
+        make_album(tmp_path / "media" / f"a{n}", {"name": f"test{n}"})
+    monkeypatch.setattr(library, "PUBLISH_INTERVAL", 0)
+    published = []
+    monkeypatch.setattr(KitchenLibraryProvider, "_publish", lambda provider, catalog: published.append(catalog))
+
+    KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+
+    assert len(published) == 1
+
+
+def test_refresh_in_background(tmp_path, caplog):
+    make_album(tmp_path / "media" / "a1", {"name": "test1"})
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path, scan_in_background=True))
+    wait_until_ready(provider)
+    make_album(tmp_path / "media" / "a2", {"name": "test2"})
+
+    provider.refresh(None)
+    deadline = time.monotonic() + 5
+    while len(provider.browse(str(AlbumsUri()))) < 2:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    assert caplog.text == ""
+    assert [ref.name for ref in provider.browse(str(AlbumsUri()))] == ["test1", "test2"]
+
+
+def test_status_counts_items_of_each_scan(tmp_path, caplog):
+    make_album(tmp_path / "media" / "a1", {"name": "test1"})
+    make_album(tmp_path / "media" / "a2", {"name": "test2"})
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+    (tmp_path / "media" / "a2" / "index.json").unlink()
+    statuses = []
+    scan = provider._scan
+
+    def observe_scan():
+        for item in scan():
+            statuses.append(provider.status)
+            yield item
+
+    provider._scan = observe_scan
+    provider.refresh(None)
+
+    assert caplog.text == ""
+    assert [(status["scanning"], status["scanned"]) for status in statuses] == [(True, 1)]
+    assert (provider.status["scanning"], provider.status["scanned"]) == (False, 1)
+
+
+def test_refresh_does_not_modify_published_catalog(tmp_path, caplog):
+    make_album(tmp_path / "media" / "a1", {"name": "test1", "title": "One"})
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+    catalog = provider._catalog
+    make_album(tmp_path / "media" / "a2", {"name": "test2", "title": "Two"})
+
+    provider.refresh(None)
+
+    assert caplog.text == ""
+    assert [album.name for album in catalog.albums.values()] == ["test1"]
+    assert catalog.index.find("two") == set()
+    assert len(provider._catalog.albums) == 2
+
+
+def test_creates_album_links(tmp_path, caplog):
+    make_album(tmp_path / "media" / "a1", {"name": "test1"})
+    caplog.set_level(logging.INFO)
+
+    KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+
+    assert "Updated albums directory: 1 links created, 0 removed, 0 retargeted" in caplog.text
+    link_path = tmp_path / "data" / "kitchen" / "albums" / make_hash("test1")
+    assert link_path.resolve() == tmp_path / "media" / "a1"
+
+
+def test_reconciles_existing_album_links(tmp_path, caplog):
+    make_album(tmp_path / "media" / "a1", {"name": "test1"})
+    make_album(tmp_path / "media" / "a2", {"name": "test2"})
+    KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+    albums_dir = tmp_path / "data" / "kitchen" / "albums"
+    unchanged_inode = (albums_dir / make_hash("test1")).lstat().st_ino
+    (albums_dir / make_hash("test2")).unlink()
+    (albums_dir / make_hash("test2")).symlink_to(tmp_path / "media")
+    (albums_dir / "stale").symlink_to(tmp_path / "media" / "a1")
+    make_album(tmp_path / "media" / "a3", {"name": "test3"})
+    caplog.set_level(logging.INFO)
+
+    KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+
+    assert "Updated albums directory: 1 links created, 1 removed, 1 retargeted" in caplog.text
+    assert sorted(path.name for path in albums_dir.iterdir()) == sorted(make_hash(f"test{n}") for n in (1, 2, 3))
+    assert (albums_dir / make_hash("test1")).lstat().st_ino == unchanged_inode
+    assert (albums_dir / make_hash("test2")).resolve() == tmp_path / "media" / "a2"
+
+
+def test_album_links_disabled(tmp_path, caplog):
+    make_album(tmp_path / "media" / "a1", {"name": "test1"})
+
+    KitchenLibraryProvider(backend={}, config=make_config(tmp_path, album_links=False))
+
+    assert caplog.text == ""
+    assert not (tmp_path / "data" / "kitchen" / "albums").exists()
+    routes = get_album_routes(tmp_path / "data" / "kitchen")
+    assert routes.resolve(make_hash("test1")) == tmp_path / "media" / "a1"
+
+
+def test_lazy_tracks(tmp_path, caplog):
+    make_album(tmp_path / "media" / "a1", EXAMPLE_ALBUM)
+    KitchenLibraryProvider(backend={}, config=make_config(tmp_path, lazy_tracks=True))
+
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path, lazy_tracks=True))
+    album_uri = provider.browse(str(AlbumsUri()))[0].uri
+
+    assert caplog.text == ""
+    assert [ref.name for ref in provider.browse(album_uri)] == ["The Morning", "The Afternoon", "The Evening"]
+    assert [track.name for track in provider.search({"track_name": ["morn"]}).tracks] == ["The Morning"]
+    assert provider.get_playback_uri(album_uri + ":2:1") == f"file://{tmp_path}/media/a1/02/01.ogg"
+
+
+def test_lazy_tracks_changed_after_scan(tmp_path, caplog):
+    make_album(tmp_path / "media" / "a1", EXAMPLE_ALBUM)
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path, lazy_tracks=True))
+    album_uri = provider.browse(str(AlbumsUri()))[0].uri
+    make_album(tmp_path / "media" / "a1", {**EXAMPLE_ALBUM, "discs": EXAMPLE_ALBUM["discs"][:1]})
+
+    assert list(provider.search({"track_name": ["evening"]}).tracks) == []
+    assert provider.get_playback_uri(album_uri + ":2:1") is None
+    assert provider.lookup(album_uri + ":1:1") == []
+    assert provider.browse(album_uri) == []
+    assert "tracks have changed since the scan" in caplog.text
+
+
+def test_lazy_tracks_available_again(tmp_path, caplog):
+    make_album(tmp_path / "media" / "a1", EXAMPLE_ALBUM)
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path, lazy_tracks=True))
+    album_uri = provider.browse(str(AlbumsUri()))[0].uri
+    (tmp_path / "media" / "a1" / "index.json").rename(tmp_path / "index.json")
+    assert provider.lookup(album_uri) == []
+
+    (tmp_path / "index.json").rename(tmp_path / "media" / "a1" / "index.json")
+
+    assert [track.name for track in provider.lookup(album_uri)] == ["The Morning", "The Afternoon", "The Evening"]
+    assert [track.name for track in provider.search({"track_name": ["evening"]}).tracks] == ["The Evening"]
+
+
 # == root_directory ==
 
 
@@ -46,6 +325,7 @@ def test_browse_root(tmp_path, caplog):
     assert caplog.text == ""
     assert result == [
         Ref.directory(uri="kitchen:albums", name="Albums"),
+        Ref.directory(uri="kitchen:albums:letters", name="Albums A-Z"),
         Ref.directory(uri="kitchen:stations", name="Stations"),
     ]
 
@@ -62,6 +342,60 @@ def test_browse_albums(tmp_path, caplog):
     assert result == [Ref.album(uri="kitchen:album:95506c273e4ecb0333d19824d66ab586", name="John Doe - One Day")]
 
 
+def test_browse_albums_sorted_case_insensitive(tmp_path, caplog):
+    for name in ("beta", "Alpha", "Émile", "Echo"):
+        make_album(tmp_path / "media" / name, {"name": name})
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+
+    result = provider.browse("kitchen:albums")
+
+    assert caplog.text == ""
+    assert [ref.name for ref in result] == ["Alpha", "beta", "Echo", "Émile"]
+
+
+def test_browse_albums_page(tmp_path, caplog):
+    for name in ("a", "b", "c", "d", "e"):
+        make_album(tmp_path / "media" / name, {"name": name})
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path, browse_page_size=2))
+
+    result = provider.browse("kitchen:albums:page:2")
+
+    assert caplog.text == ""
+    assert [ref.name for ref in result] == ["c", "d", "Page 3 of 3"]
+    assert result[2] == Ref.directory(uri="kitchen:albums:page:3", name="Page 3 of 3")
+    assert [ref.name for ref in provider.browse("kitchen:albums:page:3")] == ["e"]
+    assert provider.browse("kitchen:albums:page:4") == []
+
+
+def test_browse_album_letters(tmp_path, caplog):
+    for name in ("Beta", "alpha", "Ärger", "42"):
+        make_album(tmp_path / "media" / name, {"name": name})
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+
+    result = provider.browse("kitchen:albums:letters")
+
+    assert caplog.text == ""
+    assert result == [
+        Ref.directory(uri="kitchen:albums:letter:0", name="#"),
+        Ref.directory(uri="kitchen:albums:letter:a", name="A"),
+        Ref.directory(uri="kitchen:albums:letter:b", name="B"),
+    ]
+
+
+def test_browse_albums_letter(tmp_path, caplog):
+    for name in ("Beta", "alpha", "Ärger", "Anton", "42"):
+        make_album(tmp_path / "media" / name, {"name": name})
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path, browse_page_size=2))
+
+    result = provider.browse("kitchen:albums:letter:a")
+
+    assert caplog.text == ""
+    assert [ref.name for ref in result] == ["alpha", "Anton", "Page 2 of 2"]
+    assert result[2].uri == "kitchen:albums:letter:a:2"
+    assert [ref.name for ref in provider.browse("kitchen:albums:letter:a:2")] == ["Ärger"]
+    assert provider.browse("kitchen:albums:letter:z") == []
+
+
 def test_browse_stations(tmp_path, caplog):
     make_station(tmp_path / "media" / "r1", {"name": "Radio 1", "stream": "http://radio1.com/stream"})
     provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
@@ -144,6 +478,20 @@ def test_lookup_album(tmp_path, caplog):
     assert isinstance(result[0], Track)
 
 
+def test_lookup_album_reuses_models(tmp_path, caplog):
+    make_album(tmp_path / "media" / "a1", EXAMPLE_ALBUM)
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+    album_uri = provider.browse("kitchen:albums")[0].uri
+    tracks = provider.lookup(album_uri)
+
+    result = provider.lookup(album_uri)
+
+    assert caplog.text == ""
+    assert all(track is cached for track, cached in zip(result, tracks))
+    assert provider.lookup(album_uri + ":2:1")[0] is tracks[2]
+    assert provider.search({"track_name": ["evening"]}).tracks[0] is tracks[2]
+
+
 def test_lookup_missing_album(tmp_path, caplog):
     make_album(tmp_path / "media" / "a1", EXAMPLE_ALBUM)
     provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
@@ -327,6 +675,150 @@ def test_search_match_albumartist_exact(tmp_path, caplog):
     assert result.tracks == ()
 
 
+def test_search_match_artist(tmp_path, caplog):
+    tracks = [{"path": "01.ogg", "title": "Morning", "artist": "Jack Johnson"}, {"path": "02.ogg", "title": "Noon"}]
+    make_album(tmp_path / "media" / "a1", {"name": "test1", "title": "One", "artist": "John Jackson", "tracks": tracks})
+    make_album(tmp_path / "media" / "a2", {"name": "test2", "title": "Two", "artist": "Jack Johnson"})
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+
+    result = provider.search({"artist": ["johnson"]})
+
+    assert caplog.text == ""
+    assert result.albums == ()
+    assert [track.name for track in result.tracks] == ["Morning"]
+    assert provider.search({"albumartist": ["johnson"]}).tracks == ()
+    assert [track.name for track in provider.search({"any": ["johnson"]}).tracks] == ["Morning"]
+
+
+def test_search_ranks_results(tmp_path, caplog):
+    make_album(tmp_path / "media" / "a1", {"name": "test1", "title": "Daylight", "artist": "Day"})
+    make_album(tmp_path / "media" / "a2", {"name": "test2", "title": "Day", "artist": "Night"})
+    make_album(tmp_path / "media" / "a3", {"name": "test3", "title": "Days", "artist": "Night"})
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+
+    result = provider.search({"any": ["day"]})
+
+    assert caplog.text == ""
+    # exact title match, exact artist match, prefix title match
+    assert [album.name for album in result.albums] == ["Day", "Daylight", "Days"]
+
+
+def test_search_ranks_tracks_by_album_and_track_order(tmp_path, caplog):
+    titles = ["Rainbow", "Rain Dance", "Sun", "Rain"]
+    tracks = [{"path": f"{no:02}.ogg", "title": title} for no, title in enumerate(titles, start=1)]
+    make_album(tmp_path / "media" / "a1", {"name": "test1", "title": "Weather", "tracks": tracks})
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+
+    result = provider.search({"any": ["rain"]})
+
+    assert caplog.text == ""
+    assert [track.name for track in result.tracks] == ["Rain Dance", "Rain", "Rainbow"]
+
+
+def test_search_limits_results(tmp_path, caplog):
+    tracks = [{"path": f"{no:02}.ogg", "title": f"Song {no}"} for no in range(1, 6)]
+    make_album(tmp_path / "media" / "a1", {"name": "test1", "title": "Songs", "tracks": tracks})
+    make_album(tmp_path / "media" / "a2", {"name": "test2", "title": "Song"})
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path, search_max_results=2))
+
+    result = provider.search({"any": ["song"]})
+
+    assert caplog.text == ""
+    assert [album.name for album in result.albums] == ["Song", "Songs"]
+    assert [track.name for track in result.tracks] == ["Song 1", "Song 2"]
+
+
+def test_search_caches_results(tmp_path, caplog):
+    make_album(tmp_path / "media" / "a1", {"name": "test1", "title": "One Day"})
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+    result = provider.search({"album": ["one day"]})
+
+    assert provider.search({"album": [" One  DAY "]}) == result
+    provider.search({"album": ["one day"]}, exact=True)
+    assert provider.status["search_cache_hits"] == 1
+    assert provider.status["search_cache_misses"] == 2
+    assert caplog.text == ""
+
+
+def test_search_cache_is_cleared_on_refresh(tmp_path, caplog):
+    make_album(tmp_path / "media" / "a1", {"name": "test1", "title": "One"})
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+    provider.search({"album": ["one"]})
+    make_album(tmp_path / "media" / "a2", {"name": "test2", "title": "One more"})
+
+    provider.refresh(None)
+    result = provider.search({"album": ["one"]})
+
+    assert caplog.text == ""
+    assert [album.name for album in result.albums] == ["One", "One more"]
+
+
+def test_search_cache_counts_results_of_older_catalog_as_miss(tmp_path, caplog):
+    make_album(tmp_path / "media" / "a1", {"name": "test1", "title": "One"})
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+    catalog = provider._catalog
+    provider.search({"album": ["one"]})
+    make_album(tmp_path / "media" / "a2", {"name": "test2", "title": "One more"})
+    provider.refresh(None)
+    # a search that started before the refresh puts its result after the cache has been cleared
+    provider._search_cache.put((catalog, library._search_key({"album": ["one"]}, None, False)), "stale")
+
+    result = provider.search({"album": ["one"]})
+
+    assert caplog.text == ""
+    assert [album.name for album in result.albums] == ["One", "One more"]
+    assert provider.status["search_cache_hits"] == 0
+    assert provider.status["search_cache_misses"] == 2
+
+
+def test_search_match_station(tmp_path, caplog):
+    make_station(tmp_path / "media" / "r1", {"name": "Radio One", "stream": "http://radio1.com/stream"})
+    make_album(tmp_path / "media" / "a1", {"name": "Radio One", "title": "Radio One"})
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+    station_uri = provider.browse("kitchen:stations")[0].uri
+
+    result = provider.search({"any": ["radio"]})
+
+    assert caplog.text == ""
+    assert [album.name for album in result.albums] == ["Radio One"]
+    assert [track.uri for track in result.tracks] == [station_uri + ":1"]
+    assert [track.name for track in provider.search({"track_name": ["one"]}).tracks] == ["Radio One"]
+    assert provider.search({"album": ["one"]}).tracks == ()
+
+
+def test_search_in_album(tmp_path, caplog):
+    make_album(
+        tmp_path / "media" / "a1", {"name": "test1", "title": "One", "tracks": [{"path": "01.ogg", "title": "Sun"}]}
+    )
+    make_album(
+        tmp_path / "media" / "a2", {"name": "test2", "title": "Two", "tracks": [{"path": "01.ogg", "title": "Sun"}]}
+    )
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+    album_uri = next(ref.uri for ref in provider.browse("kitchen:albums") if ref.name == "test2")
+
+    result = provider.search({"track_name": ["sun"]}, uris=[album_uri])
+
+    assert caplog.text == ""
+    assert [track.album.name for track in result.tracks] == ["Two"]
+    assert len(provider.search({"track_name": ["sun"]}, uris=[album_uri + ":1:1"]).tracks) == 1
+    assert len(provider.search({"track_name": ["sun"]}, uris=["kitchen:albums"]).tracks) == 2
+    assert provider.search({"track_name": ["sun"]}, uris=["kitchen:album:" + "0" * 32]).tracks == ()
+
+
+def test_search_in_stations(tmp_path, caplog):
+    make_station(tmp_path / "media" / "r1", {"name": "Sun Radio", "stream": "http://radio1.com/stream"})
+    make_album(tmp_path / "media" / "a1", {"name": "test1", "title": "Sun"})
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+
+    result = provider.search({"any": ["sun"]}, uris=["kitchen:stations"])
+
+    assert caplog.text == ""
+    assert result.albums == ()
+    assert [track.name for track in result.tracks] == ["Sun Radio"]
+    assert provider.search({"any": ["sun"]}, uris=["kitchen:albums"]).tracks == ()
+    assert len(provider.search({"any": ["sun"]}, uris=["kitchen:root"]).tracks) == 1
+
+
 def test_search_match_trackname(tmp_path, caplog):
     make_album(tmp_path / "media" / "a1", EXAMPLE_ALBUM)
     provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
@@ -406,6 +898,191 @@ def test_get_images_for_multiple_uris(tmp_path, caplog):
     }
 
 
+def test_get_images_with_cover_names(tmp_path, caplog):
+    make_album(tmp_path / "media" / "a1", {"name": "test1"})
+    make_album(tmp_path / "media" / "a2", {"name": "test2"})
+    make_image(tmp_path / "media" / "a1" / "folder.jpg")
+    make_image(tmp_path / "media" / "a2" / "folder.jpg")
+    make_image(tmp_path / "media" / "a2" / "front.png")
+    config = make_config(tmp_path, cover_names=["cover.jpg", "front.png", "folder.jpg"])
+    provider = KitchenLibraryProvider(backend={}, config=config)
+    album1_uri, album2_uri = [ref.uri for ref in provider.browse(str(AlbumsUri()))]
+
+    result = provider.get_images([album1_uri, album2_uri])
+
+    assert caplog.text == ""
+    assert result == {
+        album1_uri: [Image(uri=f"/kitchen/albums/{parse_uri(album1_uri).album_id}/folder.jpg")],
+        album2_uri: [Image(uri=f"/kitchen/albums/{parse_uri(album2_uri).album_id}/front.png")],
+    }
+
+
+def test_get_images_with_thumbnails(tmp_path, caplog):
+    pil_image = pytest.importorskip("PIL.Image")
+    make_album(tmp_path / "media" / "a1", EXAMPLE_ALBUM)
+    pil_image.new("RGB", (400, 200)).save(tmp_path / "media" / "a1" / "cover.jpg", "JPEG")
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path, thumbnail_sizes=["100", "50"]))
+    provider._thumbnails.join()
+    album_uri = provider.browse(str(AlbumsUri()))[0].uri
+
+    result = provider.get_images([album_uri])
+
+    assert caplog.text == ""
+    cover, *thumbnails = result[album_uri]
+    assert cover.uri.endswith("/cover.jpg")
+    assert [(image.width, image.height) for image in thumbnails] == [(50, 25), (100, 50)]
+    assert all(image.uri.startswith("/kitchen/thumbnails/") for image in thumbnails)
+    assert (tmp_path / "data" / "kitchen" / thumbnails[0].uri[len("/kitchen/") :]).is_file()
+
+
+def test_ignores_invalid_thumbnail_sizes(tmp_path, caplog):
+    KitchenLibraryProvider(backend={}, config=make_config(tmp_path, thumbnail_sizes=["big", "0"]))
+
+    assert [record.getMessage() for record in caplog.records] == [
+        "Ignoring invalid thumbnail size 'big'",
+        "Ignoring invalid thumbnail size '0'",
+    ]
+
+
+def test_get_images_from_scan(tmp_path, caplog):
+    make_album(tmp_path / "media" / "a1", EXAMPLE_ALBUM)
+    make_album(tmp_path / "media" / "a2", {"name": "test2"})
+    make_image(tmp_path / "media" / "a1" / "cover.jpg")
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+    album_uri = provider.browse(str(AlbumsUri()))[0].uri
+    (tmp_path / "media" / "a1" / "cover.jpg").unlink()
+    make_image(tmp_path / "media" / "a2" / "cover.jpg")
+
+    result = provider.get_images([album_uri, provider.browse(str(AlbumsUri()))[1].uri, "kitchen:stations"])
+
+    assert caplog.text == ""
+    assert list(result) == [album_uri]
+
+
+# == refresh ==
+
+
+def test_refresh_adds_new_album(tmp_path, caplog):
+    make_album(tmp_path / "media" / "a1", {"name": "test1", "title": "One"})
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+    make_album(tmp_path / "media" / "a2", {"name": "test2", "title": "Two"})
+
+    provider.refresh(None)
+
+    assert caplog.text == ""
+    assert [ref.name for ref in provider.browse("kitchen:albums")] == ["test1", "test2"]
+    assert [album.name for album in provider.search({"album": ["two"]}).albums] == ["Two"]
+    album_id = parse_uri(provider.browse("kitchen:albums")[1].uri).album_id
+    assert (tmp_path / "data" / "kitchen" / "albums" / album_id).resolve() == tmp_path / "media" / "a2"
+
+
+def test_refresh_removes_album(tmp_path, caplog):
+    make_album(tmp_path / "media" / "a1", {"name": "test1", "title": "One"})
+    make_album(tmp_path / "media" / "a2", {"name": "test2", "title": "Two"})
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+    album_id = parse_uri(provider.browse("kitchen:albums")[1].uri).album_id
+    (tmp_path / "media" / "a2" / "index.json").unlink()
+
+    provider.refresh("kitchen:albums")
+
+    assert caplog.text == ""
+    assert [ref.name for ref in provider.browse("kitchen:albums")] == ["test1"]
+    assert provider.search({"album": ["two"]}).albums == ()
+    assert not (tmp_path / "data" / "kitchen" / "albums" / album_id).is_symlink()
+
+
+def test_refresh_updates_modified_album(tmp_path, caplog):
+    make_album(tmp_path / "media" / "a1", {"name": "test1", "title": "One"})
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+    make_album(tmp_path / "media" / "a1", {"name": "test1", "title": "Uno", "artist": "John Doe"})
+
+    provider.refresh(None)
+
+    assert caplog.text == ""
+    assert provider.search({"album": ["one"]}).albums == ()
+    assert [album.name for album in provider.search({"album": ["uno"]}).albums] == ["Uno"]
+
+
+def test_refresh_keeps_unchanged_albums(tmp_path, caplog):
+    make_album(tmp_path / "media" / "a1", {"name": "test1", "title": "One"})
+    make_album(tmp_path / "media" / "a2", {"name": "test2", "title": "Two"})
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+    make_album(tmp_path / "media" / "a2", {"name": "test2", "title": "Zwei"})
+    caplog.set_level(logging.INFO)
+
+    provider.refresh(None)
+
+    assert "Updated library: 1 albums added or modified, 0 removed" in caplog.text
+
+
+def test_refresh_album(tmp_path, caplog):
+    make_album(tmp_path / "media" / "a1", {"name": "test1", "title": "One"})
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+    album_uri = provider.browse("kitchen:albums")[0].uri
+    make_album(tmp_path / "media" / "a1", {"name": "test1", "title": "Uno"})
+
+    provider.refresh(album_uri)
+
+    assert caplog.text == ""
+    assert [album.name for album in provider.search({"album": ["uno"]}).albums] == ["Uno"]
+    assert provider.search({"album": ["one"]}).albums == ()
+
+
+def test_refresh_album_updates_album_link(tmp_path, caplog):
+    make_album(tmp_path / "media" / "a1", {"name": "test1"})
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+    album_uri = provider.browse("kitchen:albums")[0].uri
+    make_album(tmp_path / "media" / "a1", {"name": "test2"})
+
+    provider.refresh(album_uri)
+
+    assert caplog.text == ""
+    albums_dir = tmp_path / "data" / "kitchen" / "albums"
+    assert [path.name for path in albums_dir.iterdir()] == [make_hash("test2")]
+    assert (albums_dir / make_hash("test2")).resolve() == tmp_path / "media" / "a1"
+
+
+def test_refresh_album_finds_new_cover(tmp_path, caplog):
+    make_album(tmp_path / "media" / "a1", EXAMPLE_ALBUM)
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+    album_uri = provider.browse("kitchen:albums")[0].uri
+    make_image(tmp_path / "media" / "a1" / "cover.jpg")
+    provider.refresh(None)
+    assert provider.get_images([album_uri]) == {}
+
+    provider.refresh(album_uri)
+    restarted = KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+
+    assert caplog.text == ""
+    assert provider.get_images([album_uri])[album_uri][0].uri.endswith("/cover.jpg")
+    assert restarted.get_images([album_uri])[album_uri][0].uri.endswith("/cover.jpg")
+
+
+def test_refresh_album_rebuilds_models(tmp_path, caplog):
+    make_album(tmp_path / "media" / "a1", {"name": "test1", "title": "One", "tracks": [{"path": "01.ogg"}]})
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+    album_uri = provider.browse("kitchen:albums")[0].uri
+    provider.lookup(album_uri)
+    make_album(tmp_path / "media" / "a1", {"name": "test1", "title": "Uno", "tracks": [{"path": "01.ogg"}]})
+
+    provider.refresh(album_uri)
+
+    assert caplog.text == ""
+    assert [track.album.name for track in provider.lookup(album_uri)] == ["Uno"]
+
+
+def test_refresh_album_with_invalid_index(tmp_path, caplog):
+    make_album(tmp_path / "media" / "a1", {"name": "test1", "title": "One"})
+    provider = KitchenLibraryProvider(backend={}, config=make_config(tmp_path))
+    album_uri = provider.browse("kitchen:albums")[0].uri
+    make_album(tmp_path / "media" / "a1", {"title": "One"})
+
+    provider.refresh(album_uri)
+
+    assert provider.browse("kitchen:albums") == []
+    assert provider.search({"album": ["one"]}).albums == ()
+
+
 # == get_playback_uri ==
 
 
@@ -431,5 +1108,12 @@ def test_get_playback_uri_station_stream(tmp_path, caplog):
     assert result == "http://radio1.com/stream"
 
 
+def wait_until_ready(provider, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not provider.status["ready"]:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
 def join_artists(album: Album):
     return ",".join(artist.name for artist in album.artists)
@@ -0,0 +1,61 @@
+from mopidy_kitchen.lru_cache import LruCache
+
+
+def test_get_missing():
+    cache = LruCache(2)
+
+    assert cache.get("foo") is None
+    assert cache.get("foo", 23) == 23
+    assert cache.misses == 2
+
+
+def test_put_and_get():
+    cache = LruCache(2)
+
+    cache.put("foo", 1)
+
+    assert cache.get("foo") == 1
+    assert cache.hits == 1
+
+
+def test_evicts_least_recently_used():
+    cache = LruCache(2)
+    cache.put("foo", 1)
+    cache.put("bar", 2)
+    cache.get("foo")
+
+    cache.put("baz", 3)
+
+    assert len(cache) == 2
+    assert cache.get("foo") == 1
+    assert cache.get("bar") is None
+    assert cache.get("baz") == 3
+
+
+def test_zero_size():
+    cache = LruCache(0)
+
+    cache.put("foo", 1)
+
+    assert len(cache) == 0
+    assert cache.get("foo") is None
+
+
+def test_remove():
+    cache = LruCache(2)
+    cache.put("foo", 1)
+
+    cache.remove("foo")
+    cache.remove("bar")
+
+    assert len(cache) == 0
+    assert cache.get("foo") is None
+
+
+def test_clear():
+    cache = LruCache(2)
+    cache.put("foo", 1)
+
+    cache.clear()
+
+    assert len(cache) == 0
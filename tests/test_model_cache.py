@@ -0,0 +1,117 @@
+from pathlib import Path
+
+from mopidy.models import Album, Artist, Track
+
+from mopidy_kitchen.index_files import AlbumIndex
+from mopidy_kitchen.model_cache import ModelCache
+
+from .helpers import EXAMPLE_ALBUM, make_album
+
+
+def make_album_index(title="One Day"):
+    return AlbumIndex({**EXAMPLE_ALBUM, "title": title}, Path("/media/a1"))
+
+
+def test_album():
+    cache = ModelCache()
+    album = make_album_index()
+
+    result = cache.album("a1", album)
+
+    assert isinstance(result, Album)
+    assert result.uri == "kitchen:album:a1"
+    assert result.name == "One Day"
+    assert result.num_tracks == 3
+    assert result.num_discs == 2
+    assert [artist.name for artist in result.artists] == ["John Doe"]
+
+
+def test_album_is_built_once():
+    cache = ModelCache()
+    album = make_album_index()
+
+    result = cache.album("a1", album)
+
+    assert cache.album("a1", album) is result
+    assert cache.albums.hits == 1
+
+
+def test_tracks():
+    cache = ModelCache()
+    album = make_album_index()
+
+    result = cache.tracks("a1", album)
+
+    assert all(isinstance(track, Track) for track in result)
+    assert [track.uri for track in result] == ["kitchen:album:a1:1:1", "kitchen:album:a1:1:2", "kitchen:album:a1:2:1"]
+    assert [track.name for track in result] == ["The Morning", "The Afternoon", "The Evening"]
+    assert all(track.album is cache.album("a1", album) for track in result)
+    assert cache.tracks("a1", album) is result
+
+
+def test_track():
+    cache = ModelCache()
+    album = make_album_index()
+
+    result = cache.track("a1", album, 2)
+
+    assert result.uri == "kitchen:album:a1:2:1"
+    assert result is cache.tracks("a1", album)[2]
+
+
+def test_track_out_of_range():
+    cache = ModelCache()
+    album = make_album_index()
+
+    assert cache.track("a1", album, 3) is None
+    assert cache.track("a1", album, -1) is None
+
+
+def test_tracks_of_unavailable_album_are_not_kept(tmp_path, caplog):
+    album = AlbumIndex(EXAMPLE_ALBUM, tmp_path, lazy=True)
+    cache = ModelCache()
+    assert cache.tracks("a1", album) == ()
+    assert cache.track("a1", album, 0) is None
+
+    make_album(tmp_path, EXAMPLE_ALBUM)
+
+    assert [track.name for track in cache.tracks("a1", album)] == ["The Morning", "The Afternoon", "The Evening"]
+
+
+def test_artist():
+    cache = ModelCache()
+
+    result = cache.artist("John Doe")
+
+    assert isinstance(result, Artist)
+    assert result.name == "John Doe"
+    assert result.uri.startswith("kitchen:artist:")
+    assert cache.artist("John Doe") is result
+
+
+def test_rebuilds_models_of_replaced_album():
+    cache = ModelCache()
+    cache.album("a1", make_album_index())
+
+    result = cache.album("a1", make_album_index("Another Day"))
+
+    assert result.name == "Another Day"
+
+
+def test_invalidate():
+    cache = ModelCache()
+    album = make_album_index()
+    cache.album("a1", album)
+
+    cache.invalidate("a1")
+
+    assert len(cache.albums) == 0
+
+
+def test_evicts_least_recently_used_albums():
+    cache = ModelCache(albums_size=1)
+    cache.album("a1", make_album_index())
+
+    cache.album("a2", make_album_index())
+
+    assert len(cache.albums) == 1
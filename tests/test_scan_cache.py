@@ -0,0 +1,156 @@
+import logging
+import os
+
+from mopidy_kitchen.scan_cache import ScanCache
+from mopidy_kitchen.scanner import scan_dir
+
+from .helpers import make_album
+
+
+def test_lookup_empty(tmp_path):
+    make_album(tmp_path / "a", {"name": "Foo"})
+    cache = ScanCache()
+
+    file_path = str(tmp_path / "a" / "index.json")
+    result = cache.lookup(file_path, os.stat(file_path))
+
+    assert result is None
+
+
+def test_lookup_unchanged(tmp_path):
+    make_album(tmp_path / "a", {"name": "Foo"})
+    file_path = str(tmp_path / "a" / "index.json")
+    cache = ScanCache()
+    cache.store(file_path, os.stat(file_path), "item")
+    cache.commit()
+
+    result = cache.lookup(file_path, os.stat(file_path))
+
+    assert result == "item"
+
+
+def test_lookup_modified(tmp_path):
+    make_album(tmp_path / "a", {"name": "Foo"})
+    file_path = str(tmp_path / "a" / "index.json")
+    cache = ScanCache()
+    cache.store(file_path, os.stat(file_path), "item")
+    cache.commit()
+    make_album(tmp_path / "a", {"name": "Foo, modified"})
+
+    result = cache.lookup(file_path, os.stat(file_path))
+
+    assert result is None
+
+
+def test_update_replaces_entry_and_saves(tmp_path):
+    make_album(tmp_path / "a", {"name": "Foo"})
+    file_path = str(tmp_path / "a" / "index.json")
+    cache = ScanCache(tmp_path / "cache")
+    cache.store(file_path, os.stat(file_path), "item")
+    cache.commit()
+
+    cache.update(file_path, os.stat(file_path), "new item")
+
+    assert cache.lookup(file_path, os.stat(file_path)) == "new item"
+    loaded = ScanCache(tmp_path / "cache")
+    loaded.load()
+    assert loaded.lookup(file_path, os.stat(file_path)) == "new item"
+
+
+def test_commit_drops_stale_entries(tmp_path):
+    make_album(tmp_path / "a", {"name": "Foo"})
+    make_album(tmp_path / "b", {"name": "Bar"})
+    cache = ScanCache()
+    scan_dir(tmp_path, cache=cache)
+    (tmp_path / "b" / "index.json").unlink()
+
+    scan_dir(tmp_path, cache=cache)
+
+    assert len(cache) == 1
+
+
+def test_save_and_load(tmp_path):
+    make_album(tmp_path / "media" / "a", {"name": "Foo"})
+    cache = ScanCache(tmp_path / "cache")
+    scan_dir(tmp_path / "media", cache=cache)
+
+    loaded = ScanCache(tmp_path / "cache")
+    loaded.load()
+    file_path = str(tmp_path / "media" / "a" / "index.json")
+    result = loaded.lookup(file_path, os.stat(file_path))
+
+    assert len(loaded) == 1
+    assert result.name == "Foo"
+    assert result.path == tmp_path / "media" / "a"
+
+
+def test_commit_skips_save_if_unchanged(tmp_path):
+    make_album(tmp_path / "media" / "a", {"name": "Foo"})
+    scan_dir(tmp_path / "media", cache=ScanCache(tmp_path / "cache"))
+    os.utime(tmp_path / "cache", ns=(0, 0))
+    cache = ScanCache(tmp_path / "cache")
+    cache.load()
+
+    scan_dir(tmp_path / "media", cache=cache)
+
+    assert os.stat(tmp_path / "cache").st_mtime_ns == 0
+
+
+def test_commit_saves_stored_entries(tmp_path):
+    make_album(tmp_path / "media" / "a", {"name": "Foo"})
+    scan_dir(tmp_path / "media", cache=ScanCache(tmp_path / "cache"))
+    os.utime(tmp_path / "cache", ns=(0, 0))
+    cache = ScanCache(tmp_path / "cache")
+    cache.load()
+    make_album(tmp_path / "media" / "b", {"name": "Bar"})
+
+    scan_dir(tmp_path / "media", cache=cache)
+
+    assert os.stat(tmp_path / "cache").st_mtime_ns != 0
+
+
+def test_commit_saves_dropped_entries(tmp_path):
+    make_album(tmp_path / "media" / "a", {"name": "Foo"})
+    make_album(tmp_path / "media" / "b", {"name": "Bar"})
+    scan_dir(tmp_path / "media", cache=ScanCache(tmp_path / "cache"))
+    os.utime(tmp_path / "cache", ns=(0, 0))
+    cache = ScanCache(tmp_path / "cache")
+    cache.load()
+    (tmp_path / "media" / "b" / "index.json").unlink()
+
+    scan_dir(tmp_path / "media", cache=cache)
+
+    loaded = ScanCache(tmp_path / "cache")
+    loaded.load()
+    assert len(loaded) == 1
+
+
+def test_load_with_different_options(tmp_path):
+    make_album(tmp_path / "media" / "a", {"name": "Foo"})
+    scan_dir(tmp_path / "media", cache=ScanCache(tmp_path / "cache", options={"lazy_tracks": False}))
+
+    loaded = ScanCache(tmp_path / "cache", options={"lazy_tracks": True})
+    loaded.load()
+
+    assert len(loaded) == 0
+
+
+def test_load_missing_file(tmp_path, caplog):
+    cache = ScanCache(tmp_path / "cache")
+
+    cache.load()
+
+    assert caplog.text == ""
+    assert len(cache) == 0
+
+
+def test_load_corrupt_file(tmp_path, caplog):
+    (tmp_path / "cache").write_text("not a pickle")
+    cache = ScanCache(tmp_path / "cache")
+
+    cache.load()
+
+    assert len(cache) == 0
+    assert len(caplog.records) == 1
+    assert caplog.records[0].levelno == logging.WARNING
+    assert caplog.records[0].getMessage().startswith(f"Could not read scan cache '{tmp_path / 'cache'}'")
@@ -1,9 +1,11 @@
 import logging
+import os
 
 from mopidy_kitchen.index_files import AlbumIndex
-from mopidy_kitchen.scanner import scan_dir, read_album
+from mopidy_kitchen.scan_cache import ScanCache
+from mopidy_kitchen.scanner import iter_dir, scan_dir, read_album
 
-from .helpers import make_album
+from .helpers import make_album, make_image, make_station
 
 
 def test_scan_dir_empty(tmp_path, caplog):
@@ -40,6 +42,136 @@ def test_scan_dir_invalid(tmp_path, caplog):
     )
 
 
+def test_scan_dir_nested(tmp_path, caplog):
+    make_album(tmp_path / "a" / "b", '{"name": "Foo"}')
+    make_album(tmp_path / "a" / "c" / "d", '{"name": "Bar"}')
+    make_station(tmp_path / "e", '{"name": "Baz", "stream": "http://baz.com/stream"}')
+
+    result = scan_dir(tmp_path)
+
+    assert caplog.text == ""
+    assert [a.name for a in result] == ["Bar", "Baz", "Foo"]
+
+
+def test_scan_dir_ignores_index_file_directories(tmp_path, caplog):
+    (tmp_path / "a" / "index.json").mkdir(parents=True)
+    make_album(tmp_path / "a" / "index.json" / "b", '{"name": "Foo"}')
+
+    result = scan_dir(tmp_path)
+
+    assert caplog.text == ""
+    assert [a.path for a in result] == [tmp_path / "a" / "index.json" / "b"]
+
+
+def test_scan_dir_parallel(tmp_path, caplog):
+    for i in range(20):
+        make_album(tmp_path / f"g{i % 3}" / f"a{i}", {"name": f"Album {i:02}"})
+    make_album(tmp_path / "g1" / "b", '{"name": 23}')
+
+    result = scan_dir(tmp_path, threads=4)
+
+    assert [a.name for a in result] == [f"Album {i:02}" for i in range(20)]
+    assert len(caplog.records) == 1
+    assert caplog.records[0].levelno == logging.ERROR
+
+
+def test_scan_dir_orders_duplicates_by_path(tmp_path, caplog):
+    make_album(tmp_path / "b", '{"name": "Foo"}')
+    make_album(tmp_path / "a", '{"name": "Foo"}')
+
+    result = scan_dir(tmp_path, threads=2)
+
+    assert [a.path for a in result] == [tmp_path / "a", tmp_path / "b"]
+
+
+def test_scan_dir_reuses_cached_items(tmp_path, caplog):
+    make_album(tmp_path / "a", '{"name": "Foo"}')
+    make_album(tmp_path / "b", '{"name": "Bar"}')
+    cache = ScanCache()
+    first = scan_dir(tmp_path, cache=cache)
+    make_album(tmp_path / "b", '{"name": "Bar, modified"}')
+
+    result = scan_dir(tmp_path, cache=cache)
+
+    assert caplog.text == ""
+    assert [a.name for a in result] == ["Bar, modified", "Foo"]
+    assert result[1] is first[1]
+
+
+def test_scan_dir_shares_artists_of_albums(tmp_path, caplog):
+    make_album(tmp_path / "a", {"name": "Foo", "artist": "John Doe"})
+    make_album(
+        tmp_path / "b", {"name": "Bar", "artist": "John Doe", "tracks": [{"path": "01.ogg", "artist": "John Doe"}]}
+    )
+
+    result = scan_dir(tmp_path)
+
+    assert caplog.text == ""
+    assert result[0].artists is result[1].artists
+    assert result[0].tracks[0].artists is result[1].artists
+
+
+def test_scan_dir_finds_cover(tmp_path, caplog):
+    make_album(tmp_path / "a", '{"name": "Foo"}')
+    make_album(tmp_path / "b", '{"name": "Bar"}')
+    make_image(tmp_path / "a" / "folder.jpg")
+    make_image(tmp_path / "a" / "front.png")
+
+    result = scan_dir(tmp_path, cover_names=("cover.jpg", "front.png", "folder.jpg"))
+
+    assert caplog.text == ""
+    assert [(a.name, a.cover) for a in result] == [("Bar", None), ("Foo", "front.png")]
+
+
+def test_scan_dir_does_not_list_cached_albums(tmp_path, caplog, monkeypatch):
+    make_album(tmp_path / "a", '{"name": "Foo"}')
+    cache = ScanCache()
+    scan_dir(tmp_path, cache=cache)
+    make_image(tmp_path / "a" / "cover.jpg")
+    listed = []
+    monkeypatch.setattr(os, "listdir", lambda dir: listed.append(dir))
+
+    result = scan_dir(tmp_path, cache=cache)
+
+    assert caplog.text == ""
+    assert listed == []
+    assert result[0].cover is None
+
+
+def test_read_album_updates_cache(tmp_path, caplog):
+    make_album(tmp_path / "a", '{"name": "Foo"}')
+    cache = ScanCache()
+    scan_dir(tmp_path, cache=cache)
+    make_image(tmp_path / "a" / "cover.jpg")
+
+    read_album(tmp_path / "a", cache=cache)
+    result = scan_dir(tmp_path, cache=cache)
+
+    assert caplog.text == ""
+    assert result[0].cover == "cover.jpg"
+
+
+def test_iter_dir(tmp_path, caplog):
+    make_album(tmp_path / "a", '{"name": "Foo"}')
+    make_album(tmp_path / "b" / "c", '{"name": "Bar"}')
+    cache = ScanCache()
+
+    result = iter_dir(tmp_path, cache=cache)
+
+    assert next(result).name in ("Foo", "Bar")
+    assert len(cache) == 0
+    assert len(list(result)) == 1
+    assert len(cache) == 2
+    assert caplog.text == ""
+
+
+def test_iter_dir_not_a_directory(tmp_path, caplog):
+    result = list(iter_dir(tmp_path / "missing"))
+
+    assert result == []
+    assert caplog.records[0].getMessage() == f"Not a directory: {tmp_path / 'missing'}"
+
+
 def test_read_album_valid(tmp_path, caplog):
     make_album(tmp_path, '{"name": "Foo"}')
 
@@ -49,6 +181,17 @@ def test_read_album_valid(tmp_path, caplog):
     type(result) == AlbumIndex
     assert result.name == "Foo"
     assert result.path == tmp_path
+    assert result.cover is None
+
+
+def test_read_album_with_cover(tmp_path, caplog):
+    make_album(tmp_path, '{"name": "Foo"}')
+    make_image(tmp_path / "folder.jpg")
+
+    result = read_album(tmp_path, cover_names=("cover.jpg", "folder.jpg"))
+
+    assert caplog.text == ""
+    assert result.cover == "folder.jpg"
 
 
 def test_read_album_invalid(tmp_path, caplog):
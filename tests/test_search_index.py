@@ -1,4 +1,5 @@
-from mopidy_kitchen.search_index import SearchIndex
+from mopidy_kitchen import search_index
+from mopidy_kitchen.search_index import SearchIndex, posting_doc, posting_field, posting_idx
 
 
 def test_finds_all_matches():
@@ -36,3 +37,176 @@ def test_finds_exact_matches():
     assert index.find("foo", exact=True) == {"r2"}
     assert index.find("fooo", exact=True) == {"r3"}
     assert index.find("fool", exact=True) == set()
+
+
+def test_remove():
+    index = SearchIndex()
+    index.add("foo bar", "r1")
+    index.add("foo baz", "r2")
+
+    index.remove("foo bar", "r1")
+
+    assert index.find("foo") == {"r2"}
+    assert index.find("bar") == set()
+    assert index.find("baz") == {"r2"}
+
+
+def test_finds_results_with_fields():
+    index = SearchIndex()
+
+    index.add("foo", "a1:album")
+    index.add("foo bar", "a1:track_name:0")
+    index.add("foo", "a2:track_name:12")
+
+    assert index.find("foo") == {"a1:album", "a1:track_name:0", "a2:track_name:12"}
+    assert index.find("bar") == {"a1:track_name:0"}
+
+
+def test_find_postings():
+    index = SearchIndex()
+    album = index.posting("a1", "album")
+    track = index.posting("a1", "track_name", 3)
+    index.add_posting("foo", album)
+    index.add_posting("foo", track)
+
+    result = index.find_postings("fo")
+
+    assert result == {album, track}
+    assert {index.doc(posting_doc(posting)) for posting in result} == {"a1"}
+    assert posting_field(album) == index.field_tag("album")
+    assert posting_field(track) == index.field_tag("track_name")
+    assert posting_idx(album) == -1
+    assert posting_idx(track) == 3
+
+
+def test_posting_is_stable():
+    index = SearchIndex()
+
+    result = index.posting("a1", "track_name", 3)
+
+    assert index.posting("a1", "track_name", 3) == result
+    assert index.posting("a2", "track_name", 3) != result
+    assert index.field_tag("album") is None
+
+
+def test_find_postings_in_field():
+    index = SearchIndex()
+    album = index.posting("a1", "album")
+    track = index.posting("a1", "track_name", 3)
+    index.add_posting("foo", album)
+    index.add_posting("foo fox", track)
+
+    assert index.find_postings("fo", fields=["album"]) == {album}
+    assert index.find_postings("fo", fields=["track_name"]) == {track}
+    assert index.find_postings("fox", exact=True, fields=["album"]) == set()
+    assert index.find_postings("fo", fields=["artist"]) == set()
+    assert index.fields == ("", "album", "track_name")
+
+
+def test_remove_posting():
+    index = SearchIndex()
+    index.add_posting("foo bar", index.posting("a1"))
+    index.add_posting("foo baz", index.posting("a2"))
+    index.build()
+
+    index.remove_posting("foo bar", index.posting("a1"))
+
+    assert index.find("foo") == {"a2"}
+    assert index.find("bar") == set()
+
+
+def test_copy_is_independent():
+    index = SearchIndex()
+    index.add("foo", "r1")
+    index.build()
+
+    copy = index.copy()
+    copy.add("foo", "r2")
+    copy.remove("foo", "r1")
+
+    assert index.find("foo") == {"r1"}
+    assert copy.find("foo") == {"r2"}
+
+
+def test_finds_prefix_across_many_words():
+    index = SearchIndex()
+    for word in ("aa", "ab", "abc", "abd", "ac", "b"):
+        index.add(f"{word} xx", f"r-{word}")
+
+    assert index.find("ab") == {"r-ab", "r-abc", "r-abd"}
+    assert index.find("a") == {"r-aa", "r-ab", "r-abc", "r-abd", "r-ac"}
+    assert index.find("abe") == set()
+    assert index.find("z") == set()
+
+
+def test_copy_keeps_unmodified_words():
+    index = SearchIndex()
+    index.add("foo bar", "r1")
+    index.build()
+
+    copy = index.copy()
+    copy.add("foo", "r2")
+    copy.build()
+
+    assert index.find("fo") == {"r1"}
+    assert copy.find("fo") == {"r1", "r2"}
+    assert copy.find("bar") == {"r1"}
+
+
+def test_find_postings_in_docs():
+    index = SearchIndex()
+    postings = [index.posting(doc, "album") for doc in ("a1", "a2", "a3")]
+    for posting in postings:
+        index.add_posting("foo", posting)
+    docs = {index.doc_no("a1"), index.doc_no("a3")}
+
+    assert index.find_postings("foo", exact=True, docs=docs) == {postings[0], postings[2]}
+    assert index.find_postings("fo", docs=docs) == {postings[0], postings[2]}
+    assert index.find_postings("fo", docs=set()) == set()
+    assert index.doc_no("a4") is None
+
+
+def test_replace_document():
+    index = SearchIndex()
+    index.add_document("a1", [("One Day", "album", -1), ("Morning", "track_name", 0)])
+    index.add_document("a2", [("Another Day", "album", -1)])
+    index.build()
+
+    copy = index.copy()
+    copy.replace_document("a1", [("One Day", "album", -1), ("Morning", "track_name", 0)], [("Two Days", "album", -1)])
+
+    assert copy.find("day", exact=True) == {"a2:album"}
+    assert copy.find("days", exact=True) == {"a1:album"}
+    assert copy.find("da") == {"a1:album", "a2:album"}
+    assert copy.find("morning") == set()
+    assert index.find("day") == {"a1:album", "a2:album"}
+    assert index.find("morning") == {"a1:track_name:0"}
+
+
+def test_remove_document():
+    index = SearchIndex()
+    index.add_document("a1", [("One Day", "album", -1)])
+    index.add_document("a2", [("Another Day", "album", -1)])
+    index.build()
+
+    index.remove_document("a1", [("One Day", "album", -1)])
+
+    assert index.find("day") == {"a2:album"}
+    assert index.find("one") == set()
+    assert index.find("d", exact=False) == {"a2:album"}
+
+
+def test_updates_are_merged(monkeypatch):
+    monkeypatch.setattr(search_index, "_MIN_MERGE_SIZE", 2)
+    index = SearchIndex()
+    index.add_document("a1", [("foo bar baz", "album", -1)])
+    index.build()
+    index.add_document("a2", [("foo", "album", -1)])
+    index.remove_document("a1", [("foo bar baz", "album", -1)])
+
+    index.build()
+
+    assert index.find("foo") == {"a2:album"}
+    assert index.find("ba") == set()
+    assert len(index.find_postings("fo", exact=True, docs={index.doc_no("a2")})) == 0
+    assert len(index.find_postings("foo", exact=True, docs={index.doc_no("a2")})) == 1
@@ -0,0 +1,161 @@
+import logging
+
+import pytest
+
+from mopidy_kitchen import thumbnails
+from mopidy_kitchen.index_files import AlbumIndex
+from mopidy_kitchen.thumbnails import ThumbnailCache
+
+PILImage = pytest.importorskip("PIL.Image")
+
+
+def make_cover(path, size=(400, 200), color="red"):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    PILImage.new("RGB", size, color).save(path, "JPEG")
+
+
+def make_album_index(path, name="foo", cover="cover.jpg"):
+    return AlbumIndex({"name": name}, path, cover=cover)
+
+
+def test_get_renders_in_background(tmp_path, caplog):
+    make_cover(tmp_path / "a1" / "cover.jpg")
+    album = make_album_index(tmp_path / "a1")
+    cache = ThumbnailCache(tmp_path / "thumbs", [100, 50])
+
+    first = cache.get(album.id, album)
+    cache.join()
+    result = cache.get(album.id, album)
+
+    assert caplog.text == ""
+    assert first == ()
+    assert [(t.width, t.height) for t in result] == [(50, 25), (100, 50)]
+    assert all((tmp_path / "thumbs" / t.file_name).is_file() for t in result)
+
+
+def test_get_without_cover(tmp_path, caplog):
+    album = make_album_index(tmp_path / "a1", cover=None)
+    cache = ThumbnailCache(tmp_path / "thumbs", [100])
+
+    assert cache.get(album.id, album) == ()
+    assert cache._jobs is None
+
+
+def test_get_shares_thumbnails_of_equal_covers(tmp_path, caplog):
+    make_cover(tmp_path / "a1" / "cover.jpg")
+    make_cover(tmp_path / "a2" / "cover.jpg")
+    album1 = make_album_index(tmp_path / "a1", "foo")
+    album2 = make_album_index(tmp_path / "a2", "bar")
+    cache = ThumbnailCache(tmp_path / "thumbs", [100])
+
+    cache.update({album1.id: album1, album2.id: album2})
+    cache.join()
+
+    assert cache.get(album1.id, album1)[0].file_name == cache.get(album2.id, album2)[0].file_name
+    assert len(list((tmp_path / "thumbs").iterdir())) == 1
+
+
+def test_get_reuses_existing_thumbnails(tmp_path, caplog, monkeypatch):
+    make_cover(tmp_path / "a1" / "cover.jpg")
+    album = make_album_index(tmp_path / "a1")
+    cache = ThumbnailCache(tmp_path / "thumbs", [100])
+    cache.update({album.id: album})
+    cache.join()
+    monkeypatch.setattr(thumbnails, "_save_image", None)
+
+    cache = ThumbnailCache(tmp_path / "thumbs", [100])
+    cache.update({album.id: album})
+    cache.join()
+
+    assert caplog.text == ""
+    assert [(t.width, t.height) for t in cache.get(album.id, album)] == [(100, 50)]
+
+
+def test_get_does_not_read_unchanged_covers_again(tmp_path, caplog, monkeypatch):
+    make_cover(tmp_path / "a1" / "cover.jpg")
+    album = make_album_index(tmp_path / "a1")
+    digests_file = tmp_path / "digests"
+    cache = ThumbnailCache(tmp_path / "thumbs", [100], digests_file=digests_file)
+    cache.update({album.id: album})
+    cache.join()
+    monkeypatch.setattr(thumbnails, "_read_file", None)
+
+    cache = ThumbnailCache(tmp_path / "thumbs", [100], digests_file=digests_file)
+    cache.update({album.id: album})
+    cache.join()
+
+    assert caplog.text == ""
+    assert [(t.width, t.height) for t in cache.get(album.id, album)] == [(100, 50)]
+
+
+def test_get_reads_changed_covers_again(tmp_path, caplog):
+    make_cover(tmp_path / "a1" / "cover.jpg")
+    album = make_album_index(tmp_path / "a1")
+    digests_file = tmp_path / "digests"
+    cache = ThumbnailCache(tmp_path / "thumbs", [100], digests_file=digests_file)
+    cache.update({album.id: album})
+    cache.join()
+    first = cache.get(album.id, album)
+    make_cover(tmp_path / "a1" / "cover.jpg", size=(200, 400))
+
+    cache = ThumbnailCache(tmp_path / "thumbs", [100], digests_file=digests_file)
+    cache.update({album.id: album})
+    cache.join()
+
+    assert caplog.text == ""
+    result = cache.get(album.id, album)
+    assert result[0].file_name != first[0].file_name
+    assert (result[0].width, result[0].height) == (50, 100)
+
+
+def test_make_thumbnails_without_jobs(tmp_path, caplog):
+    make_cover(tmp_path / "a1" / "cover.jpg")
+    (tmp_path / "thumbs").mkdir()
+    cache = ThumbnailCache(tmp_path / "thumbs", [100])
+
+    result = cache._make_thumbnails(tmp_path / "a1" / "cover.jpg")
+
+    assert caplog.text == ""
+    assert [(t.width, t.height) for t in result] == [(100, 50)]
+
+
+def test_get_renews_thumbnails_of_replaced_album(tmp_path, caplog):
+    make_cover(tmp_path / "a1" / "cover.jpg")
+    album = make_album_index(tmp_path / "a1")
+    cache = ThumbnailCache(tmp_path / "thumbs", [100])
+    cache.get(album.id, album)
+    cache.join()
+    first = cache.get(album.id, album)
+    make_cover(tmp_path / "a1" / "cover.jpg", color="blue")
+    replaced = make_album_index(tmp_path / "a1")
+
+    cache.get(replaced.id, replaced)
+    cache.join()
+
+    assert cache.get(replaced.id, replaced)[0].file_name != first[0].file_name
+
+
+def test_get_with_invalid_cover(tmp_path, caplog):
+    (tmp_path / "a1").mkdir()
+    (tmp_path / "a1" / "cover.jpg").write_text("not an image")
+    album = make_album_index(tmp_path / "a1")
+    cache = ThumbnailCache(tmp_path / "thumbs", [100])
+
+    cache.get(album.id, album)
+    cache.join()
+
+    assert cache.get(album.id, album) == ()
+    assert caplog.records[0].levelno == logging.WARNING
+    assert caplog.records[0].getMessage().startswith("Could not create thumbnails of")
+
+
+def test_disabled_without_pillow(tmp_path, caplog, monkeypatch):
+    monkeypatch.setattr(thumbnails, "PILImage", None)
+    make_cover(tmp_path / "a1" / "cover.jpg")
+    album = make_album_index(tmp_path / "a1")
+
+    cache = ThumbnailCache(tmp_path / "thumbs", [100])
+
+    assert not cache.enabled
+    assert cache.get(album.id, album) == ()
+    assert caplog.records[0].getMessage() == "Thumbnails are disabled, Pillow is not installed"
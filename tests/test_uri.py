@@ -2,6 +2,9 @@ import pytest
 
 from mopidy_kitchen.uri import (
     ROOT_URI,
+    AlbumLettersUri,
+    AlbumsLetterUri,
+    AlbumsPageUri,
     AlbumsUri,
     AlbumTrackUri,
     AlbumUri,
@@ -9,6 +12,7 @@ from mopidy_kitchen.uri import (
     StationStreamUri,
     StationUri,
     StationsUri,
+    parse_album_id,
     parse_uri,
 )
 
@@ -33,6 +37,53 @@ def test_parse_uri_albums():
     assert str(result) == "kitchen:albums"
 
 
+def test_parse_uri_albums_page():
+    result = parse_uri("kitchen:albums:page:123")
+
+    assert type(result) == AlbumsPageUri
+    assert str(result) == "kitchen:albums:page:123"
+    assert result.page == 123
+
+
+def test_parse_uri_albums_page_invalid():
+    with pytest.raises(ValueError) as err_inf:
+        parse_uri("kitchen:albums:page:0")
+
+    assert str(err_inf.value) == "Invalid kitchen URI 'kitchen:albums:page:0': Invalid page '0'"
+
+
+def test_parse_uri_album_letters():
+    result = parse_uri("kitchen:albums:letters")
+
+    assert type(result) == AlbumLettersUri
+    assert str(result) == "kitchen:albums:letters"
+
+
+def test_parse_uri_albums_letter():
+    result = parse_uri("kitchen:albums:letter:a")
+
+    assert type(result) == AlbumsLetterUri
+    assert str(result) == "kitchen:albums:letter:a"
+    assert result.letter == "a"
+    assert result.page == 1
+
+
+def test_parse_uri_albums_letter_page():
+    result = parse_uri("kitchen:albums:letter:0:2")
+
+    assert type(result) == AlbumsLetterUri
+    assert str(result) == "kitchen:albums:letter:0:2"
+    assert result.letter == "0"
+    assert result.page == 2
+
+
+def test_parse_uri_albums_letter_invalid():
+    with pytest.raises(ValueError) as err_inf:
+        parse_uri("kitchen:albums:letter:A")
+
+    assert str(err_inf.value) == "Invalid kitchen URI 'kitchen:albums:letter:A': Invalid letter 'A'"
+
+
 def test_parse_uri_stations():
     result = parse_uri("kitchen:stations")
 
@@ -99,6 +150,13 @@ def test_parse_uri_search():
     assert str(result) == "kitchen:search"
 
 
+def test_parse_album_id():
+    assert parse_album_id("kitchen:album:a1b2") == "a1b2"
+    assert parse_album_id("kitchen:album:a1b2:1:2") == "a1b2"
+    assert parse_album_id("kitchen:albums") is None
+    assert parse_album_id("kitchen:station:a1b2") is None
+
+
 def test_str_repr():
     uri = AlbumUri("foo")
 
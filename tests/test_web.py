@@ -0,0 +1,70 @@
+import shutil
+import tempfile
+from pathlib import Path
+
+import tornado.web
+from tornado.testing import AsyncHTTPTestCase
+
+from mopidy_kitchen.album_routes import get_album_routes
+from mopidy_kitchen.index_files import AlbumIndex
+from mopidy_kitchen.web import webapp_factory
+
+from .helpers import make_config, make_image
+
+
+class AlbumFileHandlerTest(AsyncHTTPTestCase):
+    def setUp(self):
+        self.tmp_path = Path(tempfile.mkdtemp())
+        self.config = make_config(self.tmp_path, album_links=False)
+        album_path = self.tmp_path / "media" / "a1"
+        album_path.mkdir()
+        make_image(album_path / "cover.jpg", "cover data")
+        make_image(self.tmp_path / "media" / "secret.txt", "secret")
+        self.album = AlbumIndex({"name": "foo"}, album_path)
+        get_album_routes(self.tmp_path / "data" / "kitchen").publish({self.album.id: self.album})
+        super().setUp()
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.tmp_path)
+
+    def get_app(self):
+        return tornado.web.Application(webapp_factory(self.config, None))
+
+    def test_get(self):
+        response = self.fetch(f"/albums/{self.album.id}/cover.jpg")
+
+        assert response.code == 200
+        assert response.body == b"cover data"
+        assert response.headers["Content-Type"] == "image/jpeg"
+
+    def test_head(self):
+        response = self.fetch(f"/albums/{self.album.id}/cover.jpg", method="HEAD")
+
+        assert response.code == 200
+        assert response.body == b""
+        assert response.headers["Content-Length"] == "10"
+
+    def test_get_missing_file(self):
+        response = self.fetch(f"/albums/{self.album.id}/missing.jpg")
+
+        assert response.code == 404
+
+    def test_get_unknown_album(self):
+        response = self.fetch("/albums/unknown/cover.jpg")
+
+        assert response.code == 404
+
+    def test_get_outside_album_directory(self):
+        response = self.fetch(f"/albums/{self.album.id}/%2E%2E/secret.txt")
+
+        assert response.code == 403
+
+    def test_get_album_published_later(self):
+        album = AlbumIndex({"name": "bar"}, self.tmp_path / "media" / "a1")
+        get_album_routes(self.tmp_path / "data" / "kitchen").publish({album.id: album})
+
+        response = self.fetch(f"/albums/{album.id}/cover.jpg")
+
+        assert response.code == 200
+        assert self.fetch(f"/albums/{self.album.id}/cover.jpg").code == 404